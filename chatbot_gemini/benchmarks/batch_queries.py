@@ -0,0 +1,57 @@
+"""Throughput of vector_query_batch (pipelined FT.SEARCH) vs one vector_query per vector.
+
+Usage (from the chatbot_gemini folder, against the Redis in config.ini):
+
+    python -m benchmarks.batch_queries --docs 20000 --queries 1000
+"""
+import time
+import argparse
+
+from benchmarks.common import (get_client, synthetic_vectors, synthetic_documents, drop_index,
+                               wait_for_indexing, print_table)
+from utils.embedding import create_index, vector_query, vector_query_batch, write_vectors
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--docs", type=int, default=20000)
+    parser.add_argument("--dim", type=int, default=768)
+    parser.add_argument("--queries", type=int, default=1000)
+    parser.add_argument("--k", type=int, default=3)
+    parser.add_argument("--batch-sizes", type=int, nargs="+", default=[10, 100, 500])
+    args = parser.parse_args()
+
+    client = get_client()
+    index_name, prefix = "idx:bench_batch", "bench_batch:"
+    vectors = synthetic_vectors(args.docs + args.queries, args.dim)
+    corpus, queries = vectors[:args.docs], vectors[args.docs:]
+    drop_index(client, index_name, prefix)
+    print(create_index(client, args.dim, index_name=index_name, prefix=prefix))
+    write_vectors(client, synthetic_documents(corpus, prefix), batch_size=1000, index_name=index_name)
+    wait_for_indexing(client, index_name)
+
+    start = time.perf_counter()
+    expected = [vector_query(client, query, k=args.k, index_name=index_name) for query in queries]
+    sequential = time.perf_counter() - start
+    rows = [{"mode": "sequential", "batch_size": 1, "queries_per_sec": round(args.queries / sequential), "speedup": 1.0, "same_results": True}]
+
+    for batch_size in args.batch_sizes:
+        start = time.perf_counter()
+        results = vector_query_batch(client, queries, k=args.k, index_name=index_name, batch_size=batch_size)
+        elapsed = time.perf_counter() - start
+        same = all([doc.id for doc in a] == [doc.id for doc in b] for a, b in zip(results, expected))
+        rows.append({
+            "mode": "pipelined",
+            "batch_size": batch_size,
+            "queries_per_sec": round(args.queries / elapsed),
+            "speedup": round(sequential / elapsed, 2),
+            "same_results": same,
+        })
+    drop_index(client, index_name, prefix)
+
+    print(f"\n{args.queries} queries over {args.docs} docs, dim={args.dim}, k={args.k}")
+    print_table(rows)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,108 @@
+"""Prompt tokens and turn latency over a long conversation: full vs bounded history.
+
+Replays the same conversation through the chain used by pages/chat.py, once with
+RedisChatMessageHistory (the whole history is sent every turn) and once with
+utils/chat_memory.BoundedChatMessageHistory. The chat model and summarizer are
+fakes whose latency grows with prompt size (--ms-per-1k-tokens), so no API key
+is needed, only Redis.
+
+Usage (from the chatbot_gemini folder):
+
+    python -m benchmarks.chat_memory --turns 100 --max-turns 6 --fold-every 4
+"""
+import time
+import random
+import argparse
+
+from langchain_core.messages import AIMessage
+from langchain_core.prompts import ChatPromptTemplate, MessagesPlaceholder
+from langchain_core.runnables import RunnableLambda
+from langchain_core.runnables.history import RunnableWithMessageHistory
+from langchain_redis import RedisChatMessageHistory
+
+from benchmarks.common import get_client, latency_summary, print_table
+from utils.chat_memory import BoundedChatMessageHistory
+from utils.context import estimate_tokens
+
+WORDS = ("redis vector search index cache latency query memory stream cluster "
+         "replica shard module json hash field score document page chunk").split()
+
+
+def fake_model(reply_words, ms_per_1k_tokens, prompt_sizes=None):
+    rng = random.Random(7)
+
+    def respond(prompt):
+        text = prompt.to_string() if hasattr(prompt, "to_string") else str(prompt)
+        tokens = estimate_tokens(text)
+        if prompt_sizes is not None:
+            prompt_sizes.append(tokens)
+        time.sleep(tokens / 1000 * ms_per_1k_tokens / 1000)
+        return AIMessage(content=" ".join(rng.choice(WORDS) for _ in range(reply_words)))
+
+    return RunnableLambda(respond)
+
+
+def run_conversation(get_history, args, prompt_sizes):
+    prompt = ChatPromptTemplate.from_messages([
+        ("system", "You are a helpful AI assistant."),
+        MessagesPlaceholder(variable_name="history"),
+        ("human", "{input}")
+    ])
+    chain = RunnableWithMessageHistory(
+        prompt | fake_model(args.reply_words, args.ms_per_1k_tokens, prompt_sizes),
+        get_history,
+        input_messages_key="input",
+        history_messages_key="history"
+    )
+    rng = random.Random(42)
+    timings = []
+    for _ in range(args.turns):
+        question = " ".join(rng.choice(WORDS) for _ in range(args.question_words))
+        start = time.perf_counter()
+        chain.invoke({"input": question}, config={"configurable": {"session_id": args.session}})
+        timings.append(time.perf_counter() - start)
+    return timings
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--turns", type=int, default=100)
+    parser.add_argument("--max-turns", type=int, default=6)
+    parser.add_argument("--fold-every", type=int, default=4)
+    parser.add_argument("--question-words", type=int, default=20)
+    parser.add_argument("--reply-words", type=int, default=150)
+    parser.add_argument("--ms-per-1k-tokens", type=float, default=50.0)
+    parser.add_argument("--session", default="bench-chat-memory")
+    args = parser.parse_args()
+
+    client = get_client()
+    connection = client.connection_pool.connection_kwargs
+    redis_url = f"redis://default:{connection['password']}@{connection['host']}:{connection['port']}"
+    summarizer = fake_model(120, args.ms_per_1k_tokens)
+
+    histories = {
+        "full": lambda session_id: RedisChatMessageHistory(session_id, redis_url=redis_url, ttl=3600),
+        "bounded": lambda session_id: BoundedChatMessageHistory(session_id, client, summarizer, max_turns=args.max_turns,
+                                                                fold_every=args.fold_every, ttl=3600, key_prefix="bench:chat:"),
+    }
+
+    rows = []
+    for mode, get_history in histories.items():
+        get_history(args.session).clear()
+        prompt_sizes = []
+        timings = run_conversation(get_history, args, prompt_sizes)
+        get_history(args.session).clear()
+        for label, turns in [("first 10", slice(0, 10)), ("last 10", slice(-10, None)), ("all", slice(None))]:
+            sizes = prompt_sizes[turns]
+            rows.append({"history": mode, "turns": label,
+                         "prompt_tokens_mean": round(sum(sizes) / len(sizes)),
+                         "prompt_tokens_max": max(sizes),
+                         **latency_summary(timings[turns])})
+
+    print(f"\n{args.turns} turns, fake model at {args.ms_per_1k_tokens} ms per 1k prompt tokens, "
+          f"bounded: max_turns={args.max_turns}, fold_every={args.fold_every}")
+    print_table(rows)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,99 @@
+"""Turn latency and prompt size per user as concurrent chat sessions are added.
+
+Each simulated user runs a conversation in its own thread through the chain used by
+pages/chat.py, with BoundedChatMessageHistory and the fake, prompt-size-dependent
+chat model from benchmarks.chat_memory. With --shared, every user writes to the
+same session (the old user_session = "default"), so prompts grow with the total
+traffic instead of with each user's own conversation. Needs Redis, no API key.
+
+Usage (from the chatbot_gemini folder):
+
+    python -m benchmarks.chat_sessions_load --users 1 5 10 25 50 --turns 20
+    python -m benchmarks.chat_sessions_load --users 1 5 10 25 50 --turns 20 --shared
+"""
+import time
+import random
+import argparse
+from concurrent.futures import ThreadPoolExecutor
+
+from langchain_core.prompts import ChatPromptTemplate, MessagesPlaceholder
+from langchain_core.runnables.history import RunnableWithMessageHistory
+
+from benchmarks.common import get_client, latency_summary, print_table
+from benchmarks.chat_memory import WORDS, fake_model
+from utils.chat_memory import BoundedChatMessageHistory
+
+KEY_PREFIX = "bench:sessions:"
+
+
+def run_user(chain, session_id, turns, question_words, seed):
+    rng = random.Random(seed)
+    timings = []
+    for _ in range(turns):
+        question = " ".join(rng.choice(WORDS) for _ in range(question_words))
+        start = time.perf_counter()
+        chain.invoke({"input": question}, config={"configurable": {"session_id": session_id}})
+        timings.append(time.perf_counter() - start)
+    return timings
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--users", type=int, nargs="+", default=[1, 5, 10, 25, 50])
+    parser.add_argument("--turns", type=int, default=20)
+    parser.add_argument("--max-turns", type=int, default=6)
+    parser.add_argument("--fold-every", type=int, default=4)
+    parser.add_argument("--question-words", type=int, default=20)
+    parser.add_argument("--reply-words", type=int, default=150)
+    parser.add_argument("--ms-per-1k-tokens", type=float, default=50.0)
+    parser.add_argument("--shared", action="store_true")
+    args = parser.parse_args()
+
+    client = get_client()
+    summarizer = fake_model(120, args.ms_per_1k_tokens)
+
+    def get_history(session_id):
+        return BoundedChatMessageHistory(session_id, client, summarizer, max_turns=args.max_turns,
+                                         fold_every=args.fold_every, ttl=600, key_prefix=KEY_PREFIX)
+
+    prompt = ChatPromptTemplate.from_messages([
+        ("system", "You are a helpful AI assistant."),
+        MessagesPlaceholder(variable_name="history"),
+        ("human", "{input}")
+    ])
+
+    rows = []
+    for users in args.users:
+        for key in client.scan_iter(f"{KEY_PREFIX}*"):
+            client.delete(key)
+        prompt_sizes = []
+        chain = RunnableWithMessageHistory(
+            prompt | fake_model(args.reply_words, args.ms_per_1k_tokens, prompt_sizes),
+            get_history,
+            input_messages_key="input",
+            history_messages_key="history"
+        )
+        sessions = ["default" if args.shared else f"user-{user}" for user in range(users)]
+        with ThreadPoolExecutor(max_workers=users) as executor:
+            futures = [executor.submit(run_user, chain, session, args.turns, args.question_words, seed)
+                       for seed, session in enumerate(sessions)]
+            timings = [timing for future in futures for timing in future.result()]
+
+        lengths = [client.llen(f"{KEY_PREFIX}{session}:messages") for session in set(sessions)]
+        rows.append({"users": users,
+                     "sessions": "shared" if args.shared else "per user",
+                     "prompt_tokens_mean": round(sum(prompt_sizes) / len(prompt_sizes)),
+                     "prompt_tokens_max": max(prompt_sizes),
+                     "max_list_len": max(lengths),
+                     **latency_summary(timings)})
+
+    for key in client.scan_iter(f"{KEY_PREFIX}*"):
+        client.delete(key)
+
+    print(f"\n{args.turns} turns per user, fake model at {args.ms_per_1k_tokens} ms per 1k prompt tokens, "
+          f"max_turns={args.max_turns}, fold_every={args.fold_every}")
+    print_table(rows)
+
+
+if __name__ == "__main__":
+    main()
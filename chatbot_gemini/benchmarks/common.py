@@ -0,0 +1,94 @@
+import sys
+import time
+import redis
+import numpy as np
+from pathlib import Path
+from configparser import ConfigParser
+
+# Benchmarks are run from the chatbot_gemini folder: python -m benchmarks.<name>
+APP_DIR = Path(__file__).resolve().parent.parent
+if str(APP_DIR) not in sys.path:
+    sys.path.insert(0, str(APP_DIR))
+
+from utils.embedding import settings_key, version_key
+
+
+def get_client(decode_responses=True):
+    config_obj = ConfigParser()
+    config_obj.read(APP_DIR / "config.ini")
+    redis_host = config_obj['REDIS_INFO']['host']
+    redis_port = config_obj['REDIS_INFO']['port']
+    redis_pass = config_obj['REDIS_INFO']['password']
+    return redis.Redis(host=redis_host, port=redis_port, password=redis_pass, decode_responses=decode_responses)
+
+
+def synthetic_vectors(count, dim, clusters=64, seed=42):
+    # Clustered gaussian data is closer to real embeddings than uniform noise
+    rng = np.random.default_rng(seed)
+    centers = rng.normal(size=(clusters, dim)).astype(np.float32)
+    labels = rng.integers(0, clusters, size=count)
+    vectors = centers[labels] + 0.35 * rng.normal(size=(count, dim)).astype(np.float32)
+    vectors /= np.linalg.norm(vectors, axis=1, keepdims=True)
+    return vectors.astype(np.float32)
+
+
+def synthetic_documents(vectors, prefix):
+    documents = []
+    for i, vector in enumerate(vectors):
+        documents.append({
+            "redis_key": f"{prefix}{i:08}",
+            "element_id": f"el{i}",
+            "doc_id": f"doc{i // 20}",
+            "id": str(i),
+            "text": f"synthetic chunk number {i}",
+            "title": f"title {i // 20}",
+            "authors": f"author{i % 10}",
+            "published": "2024-01-01",
+            "vector": vector.tolist(),
+        })
+    return documents
+
+
+def drop_index(client, index_name, prefix):
+    try:
+        client.ft(index_name).dropindex(delete_documents=True)
+    except Exception:
+        pass
+    for key in client.scan_iter(f"{prefix}*", count=1000):
+        client.delete(key)
+    client.delete(settings_key(index_name), version_key(index_name))
+
+
+def wait_for_indexing(client, index_name, timeout=600):
+    start = time.perf_counter()
+    while time.perf_counter() - start < timeout:
+        info = client.ft(index_name).info()
+        if str(info.get("indexing", "0")) == "0":
+            return time.perf_counter() - start
+        time.sleep(0.2)
+    raise TimeoutError(f"{index_name} still indexing after {timeout}s")
+
+
+def exact_top_k(corpus, queries, k):
+    # Ground truth for normalized vectors: cosine similarity is a dot product
+    scores = queries @ corpus.T
+    return [list(row) for row in np.argsort(-scores, axis=1)[:, :k]]
+
+
+def latency_summary(samples):
+    samples = np.asarray(samples) * 1000
+    return {
+        "p50_ms": round(float(np.percentile(samples, 50)), 3),
+        "p99_ms": round(float(np.percentile(samples, 99)), 3),
+        "mean_ms": round(float(samples.mean()), 3),
+    }
+
+
+def print_table(rows):
+    if not rows:
+        return
+    headers = list(rows[0].keys())
+    widths = [max(len(str(h)), *(len(str(row[h])) for row in rows)) for h in headers]
+    print("  ".join(str(h).ljust(w) for h, w in zip(headers, widths)))
+    for row in rows:
+        print("  ".join(str(row[h]).ljust(w) for h, w in zip(headers, widths)))
@@ -0,0 +1,97 @@
+"""Prompt size of the old str(text_list) context vs utils/context.assemble_context.
+
+Builds synthetic search results (chunks of one page, some of them adjacent) and
+compares the context sent to the LLM: estimated tokens and assembly time. With
+--llm, also times one Gemini call per setting (uses the key in config.ini).
+
+Usage (from the chatbot_gemini folder, no Redis needed):
+
+    python -m benchmarks.context_assembly --k 4 8 16 --budgets 500 1500 3000
+"""
+import os
+import time
+import random
+import argparse
+from types import SimpleNamespace
+from configparser import ConfigParser
+
+from benchmarks.common import APP_DIR, latency_summary, print_table
+from utils.context import assemble_context, estimate_tokens
+
+WORDS = ("redis vector search index cache latency query memory stream cluster "
+         "replica shard module json hash field score document page chunk").split()
+
+SYSTEM_TEMPLATE = """
+            Your task is to answer questions by using a given context.
+
+            Don't invent anything that is outside of the context.
+
+            %CONTEXT%
+            {context}
+
+            """
+
+
+def synthetic_results(k, chunk_words, seed=42):
+    rng = random.Random(seed)
+    positions = sorted(rng.sample(range(1, k * 3), k))
+    results = []
+    for position in positions:
+        text = " ".join(rng.choice(WORDS) for _ in range(chunk_words))
+        doc = SimpleNamespace(page_content=text, metadata={"chunk_index": position, "url": "https://example.com/page"})
+        results.append((doc, round(rng.uniform(0.05, 0.6), 4)))
+    return results
+
+
+def time_llm(llm, context):
+    from langchain_core.messages import HumanMessage, SystemMessage
+    start = time.perf_counter()
+    llm.invoke([SystemMessage(content=SYSTEM_TEMPLATE.format(context=context)),
+                HumanMessage(content="Summarize the context in one sentence.")])
+    return round(time.perf_counter() - start, 3)
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--k", type=int, nargs="+", default=[4, 8, 16])
+    parser.add_argument("--budgets", type=int, nargs="+", default=[500, 1500, 3000])
+    parser.add_argument("--chunk-words", type=int, default=150)
+    parser.add_argument("--runs", type=int, default=500)
+    parser.add_argument("--llm", action="store_true")
+    args = parser.parse_args()
+
+    llm = None
+    if args.llm:
+        from langchain_google_genai import ChatGoogleGenerativeAI
+        config_obj = ConfigParser()
+        config_obj.read(APP_DIR / "config.ini")
+        os.environ.setdefault("GOOGLE_API_KEY", config_obj['GCP_INFO']['gcp_api_key'])
+        llm = ChatGoogleGenerativeAI(model="gemini-1.5-pro", temperature=0)
+
+    rows = []
+    for k in args.k:
+        results = synthetic_results(k, args.chunk_words)
+        baseline = str([doc.page_content for doc, _ in results])
+        row = {"k": k, "context": "str(list)", "tokens": estimate_tokens(baseline), "assembly_ms": "-"}
+        if llm:
+            row["llm_sec"] = time_llm(llm, baseline)
+        rows.append(row)
+
+        for budget in args.budgets:
+            timings = []
+            for _ in range(args.runs):
+                start = time.perf_counter()
+                context, tokens = assemble_context(results, token_budget=budget)
+                timings.append(time.perf_counter() - start)
+            row = {"k": k, "context": f"budget={budget}", "tokens": tokens,
+                   "assembly_ms": latency_summary(timings)["p50_ms"]}
+            if llm:
+                row["llm_sec"] = time_llm(llm, context)
+            rows.append(row)
+
+    print(f"\n{args.chunk_words} words per chunk, tokens estimated at ~4 characters per token")
+    print_table(rows)
+
+
+if __name__ == "__main__":
+    main()
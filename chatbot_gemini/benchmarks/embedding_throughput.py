@@ -0,0 +1,63 @@
+"""Embedding throughput of EmbeddingExecutor as worker processes are added.
+
+Usage (from the chatbot_gemini folder, no Redis needed):
+
+    python -m benchmarks.embedding_throughput --chunks 2000 --processes 1 2 4 8
+"""
+import os
+import time
+import random
+import argparse
+
+from benchmarks.common import print_table
+from langchain_huggingface import HuggingFaceEmbeddings
+from utils.embedding_executor import EmbeddingExecutor
+
+WORDS = ("redis vector search index cache semantic query latency memory stream cluster "
+         "document chunk embedding model retrieval answer context prompt token page").split()
+
+
+def synthetic_chunks(count, words_per_chunk=90, seed=7):
+    rng = random.Random(seed)
+    return [" ".join(rng.choices(WORDS, k=words_per_chunk)) for _ in range(count)]
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--chunks", type=int, default=2000)
+    parser.add_argument("--batch-size", type=int, default=32)
+    parser.add_argument("--processes", type=int, nargs="+", default=[1, 2, 4, os.cpu_count()])
+    args = parser.parse_args()
+
+    texts = synthetic_chunks(args.chunks)
+    model = HuggingFaceEmbeddings()
+    rows, baseline, reference = [], None, None
+    for processes in sorted(set(args.processes)):
+        executor = EmbeddingExecutor(model, batch_size=args.batch_size, processes=processes)
+        # Warm-up so model loading in the workers isn't part of the measurement
+        executor.embed_documents(texts[:args.batch_size * max(processes, 2)])
+        start = time.perf_counter()
+        vectors = executor.embed_documents(texts)
+        elapsed = time.perf_counter() - start
+        executor.shutdown()
+
+        # Batches must come back in input order whatever the pool size
+        if reference is None:
+            reference = vectors
+        same_order = all(abs(a[0] - b[0]) < 1e-4 for a, b in zip(vectors, reference))
+
+        throughput = args.chunks / elapsed
+        baseline = baseline or throughput
+        rows.append({
+            "processes": processes,
+            "chunks_per_sec": round(throughput, 1),
+            "speedup": round(throughput / baseline, 2),
+            "same_order": same_order,
+        })
+
+    print(f"\n{args.chunks} chunks, batch_size={args.batch_size}, cpus={os.cpu_count()}")
+    print_table(rows)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,83 @@
+"""Batch fetch + chunk of many pages, served by a local HTTP fixture server.
+
+Every page takes --latency seconds to respond, like a slow remote site. Usage (from
+the chatbot_gemini folder, no Redis or internet access needed):
+
+    python -m benchmarks.fetch_concurrency --pages 60 --concurrency 1 4 16
+"""
+import time
+import argparse
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from benchmarks.common import print_table
+from utils.fetching import fetch_and_chunk
+
+PARAGRAPH = ("Redis is an in-memory data store used as a database, cache, message broker and "
+             "vector database. This paragraph is repeated to give the parser something to chunk.")
+
+
+def fixture_server(pages, latency):
+    class Handler(BaseHTTPRequestHandler):
+        def do_GET(self):
+            time.sleep(latency)
+            if self.path == "/sitemap.xml":
+                host = f"http://127.0.0.1:{self.server.server_port}"
+                locations = "".join(f"<url><loc>{host}/page/{i}</loc></url>" for i in range(pages))
+                body = f'<urlset xmlns="http://www.sitemaps.org/schemas/sitemap/0.9">{locations}</urlset>'
+                content_type = "application/xml"
+            elif self.path.startswith("/page/"):
+                paragraphs = "".join(f"<p>{PARAGRAPH} ({self.path} #{i})</p>" for i in range(20))
+                body = f"<html><body><h1>{self.path}</h1>{paragraphs}</body></html>"
+                content_type = "text/html"
+            else:
+                self.send_error(404)
+                return
+            payload = body.encode("utf-8")
+            self.send_response(200)
+            self.send_header("Content-Type", content_type)
+            self.send_header("Content-Length", str(len(payload)))
+            self.end_headers()
+            self.wfile.write(payload)
+
+        def log_message(self, *args):
+            pass
+
+    server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--pages", type=int, default=60)
+    parser.add_argument("--latency", type=float, default=0.2)
+    parser.add_argument("--concurrency", type=int, nargs="+", default=[1, 4, 16])
+    args = parser.parse_args()
+
+    server = fixture_server(args.pages, args.latency)
+    host = f"http://127.0.0.1:{server.server_port}"
+    rows = []
+    for concurrency in args.concurrency:
+        start = time.perf_counter()
+        # One missing page, to show how failures are reported
+        results = fetch_and_chunk([f"{host}/missing"], sitemap=f"{host}/sitemap.xml",
+                                  max_concurrency=concurrency, per_host=concurrency)
+        elapsed = time.perf_counter() - start
+        rows.append({
+            "concurrency": concurrency,
+            "pages": len(results),
+            "failed": sum(1 for result in results if result["error"]),
+            "chunks": sum(len(result["chunks"]) for result in results),
+            "total_sec": round(elapsed, 2),
+            "pages_per_sec": round(len(results) / elapsed, 1),
+            "max_fetch_sec": max(result["fetch_time"] for result in results),
+        })
+    server.shutdown()
+
+    print(f"\n{args.pages} pages, {args.latency}s server latency per request")
+    print_table(rows)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,66 @@
+"""Recall vs latency of HNSW settings, using a FLAT index as ground truth.
+
+Usage (from the chatbot_gemini folder, against the Redis in config.ini):
+
+    python -m benchmarks.hnsw_vs_flat --docs 200000 --dim 1024 --queries 200
+"""
+import time
+import argparse
+
+from benchmarks.common import (get_client, synthetic_vectors, synthetic_documents, drop_index,
+                               wait_for_indexing, latency_summary, print_table)
+from utils.embedding import create_index, vector_query, write_vectors
+
+
+def run_queries(client, index_name, queries, k, ef_runtime=None):
+    results, timings = [], []
+    for query_vector in queries:
+        start = time.perf_counter()
+        docs = vector_query(client, query_vector, k=k, ef_runtime=ef_runtime, index_name=index_name)
+        timings.append(time.perf_counter() - start)
+        results.append([doc.id.split(":", 1)[1] for doc in docs])
+    return results, timings
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--docs", type=int, default=100000)
+    parser.add_argument("--dim", type=int, default=1024)
+    parser.add_argument("--queries", type=int, default=200)
+    parser.add_argument("--k", type=int, default=10)
+    parser.add_argument("--m", type=int, default=16)
+    parser.add_argument("--ef-construction", type=int, default=200)
+    parser.add_argument("--ef-runtime", type=int, nargs="+", default=[10, 20, 50, 100, 200])
+    args = parser.parse_args()
+
+    client = get_client()
+    vectors = synthetic_vectors(args.docs + args.queries, args.dim)
+    corpus, queries = vectors[:args.docs], vectors[args.docs:]
+
+    hnsw_params = {"M": args.m, "EF_CONSTRUCTION": args.ef_construction, "INITIAL_CAP": args.docs}
+    setups = [("idx:bench_flat", "bench_flat:", "FLAT", None), ("idx:bench_hnsw", "bench_hnsw:", "HNSW", hnsw_params)]
+    for index_name, prefix, algorithm, params in setups:
+        drop_index(client, index_name, prefix)
+        print(create_index(client, args.dim, algorithm=algorithm, hnsw_params=params, index_name=index_name, prefix=prefix))
+        start = time.perf_counter()
+        write_vectors(client, synthetic_documents(corpus, prefix), batch_size=1000, index_name=index_name)
+        build_time = time.perf_counter() - start + wait_for_indexing(client, index_name)
+        print(f"--> {algorithm}: loaded and indexed {args.docs} vectors in {build_time:.1f}s")
+
+    truth, flat_timings = run_queries(client, "idx:bench_flat", queries, args.k)
+    rows = [{"algorithm": "FLAT", "ef_runtime": "-", "recall@k": 1.0, **latency_summary(flat_timings)}]
+    for ef_runtime in args.ef_runtime:
+        found, timings = run_queries(client, "idx:bench_hnsw", queries, args.k, ef_runtime=ef_runtime)
+        hits = sum(len(set(a) & set(b)) for a, b in zip(found, truth))
+        recall = round(hits / (len(truth) * args.k), 4)
+        rows.append({"algorithm": "HNSW", "ef_runtime": ef_runtime, "recall@k": recall, **latency_summary(timings)})
+
+    print(f"\n{args.docs} docs, dim={args.dim}, k={args.k}, M={args.m}, EF_CONSTRUCTION={args.ef_construction}")
+    print_table(rows)
+
+    for index_name, prefix, _, _ in setups:
+        drop_index(client, index_name, prefix)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,92 @@
+"""Cold-start import time of the app pages, from python -X importtime.
+
+For each page, the first run of the script (streamlit's AppTest, nothing entered)
+is done in a fresh interpreter with -X importtime, so the numbers are what a new
+Streamlit process (or worker pod) pays before the page can render: module-level
+imports and everything the script imports or loads while rendering, e.g. a model
+created at module level. Streamlit itself is not counted. The report shows the
+total and the slowest top-level packages; --max-ms makes the run fail when a page
+is over budget, so an eager heavy import is caught.
+
+Usage (from the chatbot_gemini folder; pages that connect to Redis on their first
+run need it):
+
+    python -m benchmarks.import_profile --top 10
+    python -m benchmarks.import_profile --max-ms 3000
+"""
+import os
+import re
+import sys
+import argparse
+import subprocess
+
+from benchmarks.common import APP_DIR, print_table
+
+PAGES = ["gui.py", "pages/chat.py", "pages/chat_no_history.py"]
+IMPORTTIME_LINE = re.compile(r"^import time:\s+(\d+)\s+\|\s+(\d+)\s+\|( *)(\S+)")
+APPTEST_IMPORT = "from streamlit.testing.v1 import AppTest"
+
+
+def first_run(script, timeout):
+    # Also prints the wall time of the run, which includes loading models, not just importing
+    return (f"import time\n{APPTEST_IMPORT}\n"
+            f"app = AppTest.from_file({str(APP_DIR / script)!r}, default_timeout={timeout})\n"
+            f"start = time.perf_counter()\n"
+            f"app.run()\n"
+            f"if app.exception:\n"
+            f"    raise RuntimeError(app.exception[0].message)\n"
+            f"print(round((time.perf_counter() - start) * 1000, 1))\n")
+
+
+def profile_imports(code):
+    env = dict(os.environ, PYDANTIC_SKIP_VALIDATING_CORE_SCHEMAS="True")
+    result = subprocess.run([sys.executable, "-X", "importtime", "-c", code], cwd=APP_DIR, env=env,
+                            capture_output=True, text=True)
+    if result.returncode != 0:
+        raise RuntimeError(result.stderr.strip().splitlines()[-1])
+    packages = {}
+    for line in result.stderr.splitlines():
+        match = IMPORTTIME_LINE.match(line)
+        # Only top-level entries (no indentation): their cumulative time includes everything they imported
+        if match and len(match.group(3)) == 1:
+            package = match.group(4).split(".")[0]
+            packages[package] = packages.get(package, 0) + int(match.group(2))
+    return packages, result.stdout.strip().splitlines()[-1] if result.stdout.strip() else None
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--pages", nargs="+", default=PAGES)
+    parser.add_argument("--top", type=int, default=8)
+    parser.add_argument("--max-ms", type=float, default=None)
+    parser.add_argument("--timeout", type=float, default=600)
+    args = parser.parse_args()
+
+    # Modules the interpreter and streamlit load (site, encodings, tornado, ...) are not the page's cost
+    startup = set(profile_imports(APPTEST_IMPORT)[0])
+
+    summary = []
+    over_budget = []
+    for page in args.pages:
+        packages, run_ms = profile_imports(first_run(page, args.timeout))
+        packages = {name: us for name, us in packages.items() if name not in startup}
+        total_ms = round(sum(packages.values()) / 1000, 1)
+        summary.append({"page": page, "import_ms": total_ms, "packages": len(packages), "first_run_ms": run_ms})
+        if args.max_ms is not None and total_ms > args.max_ms:
+            over_budget.append(page)
+
+        rows = [{"package": name, "cumulative_ms": round(us / 1000, 1)}
+                for name, us in sorted(packages.items(), key=lambda item: item[1], reverse=True)[:args.top]]
+        print(f"\n{page}: slowest top-level imports")
+        print_table(rows)
+
+    print("\nTotal import time of the first run of each page")
+    print_table(summary)
+
+    if over_budget:
+        print(f"\n--> Over the {args.max_ms} ms budget: {', '.join(over_budget)}")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,114 @@
+"""Ingestion jobs per second through the Redis Streams job queue, for different worker counts.
+
+Enqueues --jobs URLs with utils/jobs.enqueue and starts N worker processes running
+utils/jobs.run_worker. Throughput is measured from the first job started to the last
+one finished, so model loading in the workers isn't counted.
+
+--handler ingest runs the real pipeline of ingest_worker.py (fetch, chunk, embed,
+write) against local fixture pages, into a separate idx:bench_ingest index.
+--handler sleep replaces it with a fixed --job-seconds wait, to measure the queue
+itself. Uses the ingest:jobs stream, so don't run it next to live workers.
+
+Usage (from the chatbot_gemini folder):
+
+    python -m benchmarks.ingest_workers --workers 1 2 4 --jobs 40
+    python -m benchmarks.ingest_workers --workers 1 2 4 8 --jobs 200 --handler sleep
+"""
+import time
+import argparse
+import multiprocessing
+
+from benchmarks.common import get_client, drop_index, print_table
+from benchmarks.fetch_concurrency import fixture_server
+from utils import jobs
+from utils.ingest import manifest_key
+
+INDEX_NAME = "idx:bench_ingest"
+STOP_KEY = "bench:ingest_workers:stop"
+
+
+def sleep_handler(job_seconds):
+    def handler(url, index_name, progress):
+        time.sleep(job_seconds)
+        progress({"chunks": 1, "added": 1})
+        return {"added": 1, "skipped": 0, "removed": 0}
+    return handler
+
+
+def bench_worker(handler_name, job_seconds):
+    if handler_name == "ingest":
+        from ingest_worker import load_worker
+        client, handler = load_worker()
+    else:
+        client, handler = get_client(), sleep_handler(job_seconds)
+    jobs.run_worker(client, handler, block_ms=500, stop=lambda: client.exists(STOP_KEY))
+
+
+def reset_queue(client):
+    client.delete(jobs.STREAM_KEY, STOP_KEY)
+    jobs.ensure_group(client)
+
+
+def cleanup(client, job_ids, urls):
+    # Only the keys this run created: its job status hashes and the manifests of its pages
+    keys = [jobs.job_key(job_id) for job_id in job_ids] + [manifest_key(url) for url in urls]
+    for start in range(0, len(keys), 1000):
+        client.delete(*keys[start:start + 1000])
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--workers", type=int, nargs="+", default=[1, 2, 4])
+    parser.add_argument("--jobs", type=int, default=40)
+    parser.add_argument("--handler", choices=["ingest", "sleep"], default="ingest")
+    parser.add_argument("--job-seconds", type=float, default=0.5)
+    args = parser.parse_args()
+
+    client = get_client()
+    server = fixture_server(args.jobs, 0.0)
+    host = f"http://127.0.0.1:{server.server_port}"
+    context = multiprocessing.get_context("spawn")
+
+    rows = []
+    all_job_ids, all_urls = [], []
+    for workers in args.workers:
+        reset_queue(client)
+        processes = [context.Process(target=bench_worker, args=(args.handler, args.job_seconds)) for _ in range(workers)]
+        for process in processes:
+            process.start()
+
+        # New URLs for every run, so incremental ingestion doesn't skip pages seen by the previous run
+        urls = [f"{host}/page/{workers}-{i}" for i in range(args.jobs)]
+        job_ids = [jobs.enqueue(client, url, index_name=INDEX_NAME) for url in urls]
+        all_job_ids.extend(job_ids)
+        all_urls.extend(urls)
+        while True:
+            statuses = [jobs.get_status(client, job_id) for job_id in job_ids]
+            if all(status.get("status") in ("done", "failed") for status in statuses):
+                break
+            time.sleep(0.5)
+
+        client.set(STOP_KEY, 1)
+        for process in processes:
+            process.join()
+
+        elapsed = max(float(status["finished"]) for status in statuses) - \
+            min(float(status.get("started", status["finished"])) for status in statuses)
+        rows.append({"workers": workers,
+                     "done": sum(status["status"] == "done" for status in statuses),
+                     "failed": sum(status["status"] == "failed" for status in statuses),
+                     "elapsed_sec": round(elapsed, 2),
+                     "jobs_per_sec": round(len(statuses) / elapsed, 2) if elapsed > 0 else 0.0})
+
+    client.delete(jobs.STREAM_KEY, STOP_KEY)
+    cleanup(client, all_job_ids, all_urls)
+    if args.handler == "ingest":
+        drop_index(client, INDEX_NAME, INDEX_NAME)
+    server.shutdown()
+
+    print(f"\n{args.jobs} jobs, handler={args.handler}")
+    print_table(rows)
+
+
+if __name__ == "__main__":
+    main()
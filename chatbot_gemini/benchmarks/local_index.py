@@ -0,0 +1,65 @@
+"""Open time and exact-search latency of the memory-mapped LocalVectorIndex.
+
+Builds (once) an index of --docs random vectors under --path, then times opening it
+and running unfiltered and tag-filtered queries. No Redis needed. Usage (from the
+chatbot_gemini folder):
+
+    python -m benchmarks.local_index --docs 2000000 --dim 768 --path /tmp/local_index
+"""
+import time
+import argparse
+import numpy as np
+
+from benchmarks.common import latency_summary, print_table
+from utils.local_index import LocalVectorIndex, vector_query, hybrid_query, write_vectors
+
+
+def build(path, docs, dim, batch_size=50000):
+    index = LocalVectorIndex(path, dim)
+    rng = np.random.default_rng(42)
+    for start in range(len(index), docs, batch_size):
+        count = min(batch_size, docs - start)
+        vectors = rng.normal(size=(count, dim)).astype(np.float32)
+        write_vectors(index, [{
+            "redis_key": f"vecdoc:{start + i:09}",
+            "text": f"synthetic chunk number {start + i}",
+            "title": f"title {(start + i) // 20}",
+            "authors": f"author{(start + i) % 100}",
+            "vector": vector,
+        } for i, vector in enumerate(vectors)], batch_size=count)
+        print(f"--> Written {start + count} vectors")
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--docs", type=int, default=1000000)
+    parser.add_argument("--dim", type=int, default=768)
+    parser.add_argument("--queries", type=int, default=50)
+    parser.add_argument("--path", default="/tmp/local_index_bench")
+    args = parser.parse_args()
+
+    build(args.path, args.docs, args.dim)
+
+    start = time.perf_counter()
+    index = LocalVectorIndex(args.path)
+    index.matrix()
+    open_time = time.perf_counter() - start
+
+    queries = np.random.default_rng(7).normal(size=(args.queries, args.dim)).astype(np.float32)
+    rows = []
+    for name, search in [("vector_query", lambda q: vector_query(index, q, k=3)),
+                         ("hybrid_query (1% of rows)", lambda q: hybrid_query(index, q, "author1", k=3))]:
+        timings = []
+        for query in queries:
+            start = time.perf_counter()
+            search(query)
+            timings.append(time.perf_counter() - start)
+        rows.append({"query": name, **latency_summary(timings)})
+
+    size_gb = len(index) * args.dim * 4 / 1024 ** 3
+    print(f"\n{len(index)} vectors, dim={args.dim} ({size_gb:.2f} GB), opened in {open_time * 1000:.1f} ms")
+    print_table(rows)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,60 @@
+"""KNN latency with pre-filters of different selectivity on a numeric published timestamp.
+
+Documents are spread evenly over the last --days days. Usage (from the chatbot_gemini
+folder, against the Redis in config.ini):
+
+    python -m benchmarks.prefilter_selectivity --docs 200000 --dim 768
+"""
+import time
+import argparse
+
+from benchmarks.common import (get_client, synthetic_vectors, synthetic_documents, drop_index,
+                               wait_for_indexing, latency_summary, print_table)
+from utils.embedding import create_index, vector_query, write_vectors
+from utils.filters import FilterBuilder
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--docs", type=int, default=200000)
+    parser.add_argument("--dim", type=int, default=768)
+    parser.add_argument("--queries", type=int, default=200)
+    parser.add_argument("--days", type=int, default=365)
+    parser.add_argument("--windows", type=int, nargs="+", default=[365, 90, 30, 7, 1])
+    parser.add_argument("--algorithm", default="FLAT")
+    args = parser.parse_args()
+
+    client = get_client()
+    index_name, prefix = "idx:bench_filter", "bench_filter:"
+    vectors = synthetic_vectors(args.docs + args.queries, args.dim)
+    corpus, queries = vectors[:args.docs], vectors[args.docs:]
+
+    now = time.time()
+    documents = synthetic_documents(corpus, prefix)
+    for i, document in enumerate(documents):
+        document["published"] = now - (i / args.docs) * args.days * 86400
+
+    drop_index(client, index_name, prefix)
+    print(create_index(client, args.dim, algorithm=args.algorithm, index_name=index_name, prefix=prefix, published_numeric=True))
+    write_vectors(client, documents, batch_size=1000, index_name=index_name)
+    wait_for_indexing(client, index_name)
+
+    rows = []
+    for window in [None] + args.windows:
+        filters = FilterBuilder().since("published", window, now=now) if window else None
+        timings = []
+        for query in queries:
+            start = time.perf_counter()
+            vector_query(client, query, k=3, index_name=index_name, filters=filters)
+            timings.append(time.perf_counter() - start)
+        selectivity = min(window / args.days, 1.0) if window else 1.0
+        rows.append({"filter": f"last {window} days" if window else "none",
+                     "docs_in_filter": round(args.docs * selectivity), **latency_summary(timings)})
+    drop_index(client, index_name, prefix)
+
+    print(f"\n{args.docs} docs over {args.days} days, dim={args.dim}, {args.algorithm} index")
+    print_table(rows)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,71 @@
+"""Recall loss and memory saved by FLOAT16 / BFLOAT16 vector indexes vs FLOAT32.
+
+Vectors are stored as HASHes, so both the documents and the index shrink with the
+vector type. Usage (from the chatbot_gemini folder, against the Redis in config.ini):
+
+    python -m benchmarks.reduced_precision --docs 50000 --dim 1024
+"""
+import time
+import argparse
+
+from benchmarks.common import (get_client, synthetic_vectors, synthetic_documents, drop_index, exact_top_k,
+                               wait_for_indexing, latency_summary, print_table)
+from utils.embedding import create_index, vector_query, write_vectors
+
+
+def used_memory(client):
+    return int(client.info("memory")["used_memory"])
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--docs", type=int, default=50000)
+    parser.add_argument("--dim", type=int, default=1024)
+    parser.add_argument("--queries", type=int, default=200)
+    parser.add_argument("--k", type=int, default=10)
+    parser.add_argument("--types", nargs="+", default=["FLOAT32", "FLOAT16", "BFLOAT16"])
+    args = parser.parse_args()
+
+    client = get_client()
+    vectors = synthetic_vectors(args.docs + args.queries, args.dim)
+    corpus, queries = vectors[:args.docs], vectors[args.docs:]
+    truth = exact_top_k(corpus, queries, args.k)
+
+    rows = []
+    for vector_type in args.types:
+        index_name, prefix = f"idx:bench_{vector_type.lower()}", f"bench_{vector_type.lower()}:"
+        drop_index(client, index_name, prefix)
+        print(create_index(client, args.dim, index_name=index_name, prefix=prefix, storage="hash", vector_type=vector_type))
+
+        memory_before = used_memory(client)
+        write_vectors(client, synthetic_documents(corpus, prefix), batch_size=1000, storage="hash", index_name=index_name)
+        wait_for_indexing(client, index_name)
+        memory_used = used_memory(client) - memory_before
+
+        hits, timings = 0, []
+        for query, expected in zip(queries, truth):
+            start = time.perf_counter()
+            docs = vector_query(client, query, k=args.k, index_name=index_name)
+            timings.append(time.perf_counter() - start)
+            found = {int(doc.id[len(prefix):]) for doc in docs}
+            hits += len(found & set(expected))
+
+        rows.append({
+            "type": vector_type,
+            "recall@k": round(hits / (len(truth) * args.k), 4),
+            "mb_used": round(memory_used / 1024 ** 2, 1),
+            "bytes_per_vector": round(memory_used / args.docs),
+            **latency_summary(timings),
+        })
+        drop_index(client, index_name, prefix)
+
+    baseline = rows[0]["mb_used"]
+    for row in rows:
+        row["memory_saved"] = f"{1 - row['mb_used'] / baseline:.0%}" if baseline else "-"
+
+    print(f"\n{args.docs} docs, dim={args.dim}, k={args.k}, exact float32 search as ground truth")
+    print_table(rows)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,40 @@
+"""Latency added per query by the MMR / dedup rerank stage in utils/reranking.py.
+
+Usage (from the chatbot_gemini folder, no Redis needed):
+
+    python -m benchmarks.rerank_latency --dim 768 --k 4 --multipliers 2 4 8 16
+"""
+import time
+import argparse
+
+from benchmarks.common import synthetic_vectors, latency_summary, print_table
+from utils.reranking import rerank
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--dim", type=int, default=768)
+    parser.add_argument("--k", type=int, default=4)
+    parser.add_argument("--multipliers", type=int, nargs="+", default=[2, 4, 8, 16])
+    parser.add_argument("--runs", type=int, default=2000)
+    args = parser.parse_args()
+
+    rows = []
+    for multiplier in args.multipliers:
+        candidates = args.k * multiplier
+        vectors = synthetic_vectors(args.runs + candidates, args.dim, clusters=8)
+        pool, queries = vectors[:candidates], vectors[candidates:]
+        for method in ["mmr", "dedup"]:
+            timings = []
+            for query in queries:
+                start = time.perf_counter()
+                rerank(query, pool, args.k, method=method)
+                timings.append(time.perf_counter() - start)
+            rows.append({"method": method, "candidates": candidates, **latency_summary(timings)})
+
+    print(f"\ndim={args.dim}, k={args.k}, {args.runs} runs per setting")
+    print_table(rows)
+
+
+if __name__ == "__main__":
+    main()
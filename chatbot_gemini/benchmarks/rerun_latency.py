@@ -0,0 +1,60 @@
+"""Streamlit rerun latency of the app pages, with and without resource reuse.
+
+Runs each page script repeatedly with streamlit's AppTest (in this process, like the
+Streamlit server does). "reused" keeps the utils/resources.py registry between
+reruns, as the app does now; "rebuilt" calls reset_resources() before every rerun,
+which is what every rerun used to cost (new embeddings model, clients, vector store,
+caches and LLM). The first rerun of "reused" pays the one-off setup, so it's reported
+separately. Needs Redis and the embeddings model; no question is asked, so no API calls.
+
+Usage (from the chatbot_gemini folder):
+
+    python -m benchmarks.rerun_latency --reruns 10
+"""
+import time
+import argparse
+
+from streamlit.testing.v1 import AppTest
+
+from benchmarks.common import APP_DIR, latency_summary, print_table
+from utils.resources import reset_resources
+
+PAGES = ["gui.py", "pages/chat.py", "pages/chat_no_history.py"]
+
+
+def timed_run(app):
+    start = time.perf_counter()
+    app.run()
+    elapsed = time.perf_counter() - start
+    if app.exception:
+        raise RuntimeError(f"{app.exception[0].message}")
+    return elapsed
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--reruns", type=int, default=10)
+    parser.add_argument("--pages", nargs="+", default=PAGES)
+    parser.add_argument("--timeout", type=float, default=600)
+    args = parser.parse_args()
+
+    rows = []
+    for page in args.pages:
+        for mode in ["rebuilt", "reused"]:
+            reset_resources()
+            app = AppTest.from_file(str(APP_DIR / page), default_timeout=args.timeout)
+            first = timed_run(app)
+            timings = []
+            for _ in range(args.reruns):
+                if mode == "rebuilt":
+                    reset_resources()
+                timings.append(timed_run(app))
+            rows.append({"page": page, "resources": mode, "first_run_sec": round(first, 3), **latency_summary(timings)})
+    reset_resources()
+
+    print(f"\n{args.reruns} reruns per page and mode")
+    print_table(rows)
+
+
+if __name__ == "__main__":
+    main()
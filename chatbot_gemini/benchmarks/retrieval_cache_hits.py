@@ -0,0 +1,69 @@
+"""Hit rate of utils/retrieval_cache.py for repeated, reformatted and reworded questions.
+
+Each question is asked once, then again as an exact repeat, with different case and
+punctuation, and reworded. The cached "search" returns the question's group, so a hit
+that returns another question's results is counted as a false hit. Embeds with the
+same HuggingFaceEmbeddings model as the app; no Redis needed (the index version is fixed).
+
+Usage (from the chatbot_gemini folder):
+
+    python -m benchmarks.retrieval_cache_hits --precision 1 2 3
+"""
+import argparse
+
+from benchmarks.common import print_table
+from langchain_huggingface import HuggingFaceEmbeddings
+from utils.retrieval_cache import RetrievalCache
+
+# original, reformatted, reworded
+QUESTIONS = [
+    ("What is a vector database?", "what is a vector database", "Can you explain what a vector DB is?"),
+    ("How do I create an index in Redis?", "how do i create an index in redis??", "What's the command to make a Redis index?"),
+    ("Which distance metrics are supported?", "Which distance metrics are supported", "What similarity measures can I use?"),
+    ("How does HNSW work?", "how does hnsw work ?", "Explain the HNSW algorithm."),
+    ("What is semantic caching?", "What is semantic caching", "How does a semantic cache work?"),
+    ("How can I filter results by author?", "how can I filter results by author", "Is it possible to restrict results to one author?"),
+    ("What is the maximum vector dimension?", "what is the maximum vector dimension?", "How many dimensions can a vector have at most?"),
+    ("How do I delete an index?", "How do I delete an index ?", "What's the way to drop an index?"),
+]
+KINDS = ["repeat", "reformatted", "reworded"]
+
+
+class FixedVersion:
+    def get(self, key):
+        return 0
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--precision", type=int, nargs="+", default=[1, 2, 3])
+    args = parser.parse_args()
+
+    model = HuggingFaceEmbeddings()
+    originals = model.embed_documents([group[0] for group in QUESTIONS])
+    variants = {"repeat": model.embed_documents([group[0] for group in QUESTIONS]),
+                "reformatted": model.embed_documents([group[1] for group in QUESTIONS]),
+                "reworded": model.embed_documents([group[2] for group in QUESTIONS])}
+
+    rows = []
+    for precision in args.precision:
+        row = {"precision": precision}
+        for kind in KINDS:
+            cache = RetrievalCache(precision=precision)
+            for group, vector in enumerate(originals):
+                cache.get_or_search(FixedVersion(), "idx:bench", vector, lambda: [group])
+            cache.stats = {"hits": 0, "misses": 0}
+            false_hits = 0
+            for group, vector in enumerate(variants[kind]):
+                if cache.get_or_search(FixedVersion(), "idx:bench", vector, lambda: [group]) != [group]:
+                    false_hits = false_hits + 1
+            row[f"{kind}_hit_rate"] = round(cache.hit_rate(), 2)
+            row[f"{kind}_false_hits"] = false_hits
+        rows.append(row)
+
+    print(f"\n{len(QUESTIONS)} questions, each asked once before its variants")
+    print_table(rows)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,57 @@
+"""Redis memory and insert throughput for JSON vs HASH chunk storage.
+
+Usage (from the chatbot_gemini folder, against the Redis in config.ini):
+
+    python -m benchmarks.storage_formats --docs 50000 --dim 1024
+"""
+import time
+import argparse
+
+from benchmarks.common import (get_client, synthetic_vectors, synthetic_documents, drop_index,
+                               wait_for_indexing, print_table)
+from utils.embedding import create_index, write_vectors
+
+
+def used_memory(client):
+    return int(client.info("memory")["used_memory"])
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--docs", type=int, default=50000)
+    parser.add_argument("--dim", type=int, default=1024)
+    parser.add_argument("--batch-size", type=int, default=500)
+    args = parser.parse_args()
+
+    client = get_client()
+    vectors = synthetic_vectors(args.docs, args.dim)
+    rows = []
+    for storage in ["json", "hash"]:
+        index_name, prefix = f"idx:bench_{storage}", f"bench_{storage}:"
+        documents = synthetic_documents(vectors, prefix)
+        drop_index(client, index_name, prefix)
+        print(create_index(client, args.dim, index_name=index_name, prefix=prefix, storage=storage))
+
+        memory_before = used_memory(client)
+        start = time.perf_counter()
+        results = write_vectors(client, documents, batch_size=args.batch_size, storage=storage, index_name=index_name)
+        elapsed = time.perf_counter() - start
+        wait_for_indexing(client, index_name)
+        memory_used = used_memory(client) - memory_before
+
+        failures = sum(1 for result in results if result.startswith("FAILED"))
+        rows.append({
+            "storage": storage,
+            "failures": failures,
+            "inserts_per_sec": round(args.docs / elapsed),
+            "bytes_per_chunk": round(memory_used / args.docs),
+            "gb_per_million": round(memory_used / args.docs * 1_000_000 / 1024 ** 3, 2),
+        })
+        drop_index(client, index_name, prefix)
+
+    print(f"\n{args.docs} chunks, dim={args.dim}, batch_size={args.batch_size} (memory includes the vector index)")
+    print_table(rows)
+
+
+if __name__ == "__main__":
+    main()
@@ -1,5 +1,6 @@
 import os
 import time
+import atexit
 import redis
 import streamlit as st
 
@@ -7,25 +8,27 @@ os.environ["PYDANTIC_SKIP_VALIDATING_CORE_SCHEMAS"] = "True"
 
 from configparser import ConfigParser
 
-from unstructured.partition.html import partition_html
-from unstructured.chunking.title import chunk_by_title
-from unstructured.staging.base import convert_to_dict, dict_to_elements
-from utils.rag_schema import Document as rag_document
+from utils.embedding_cache import CachedEmbeddings
+from utils.embedding_executor import EmbeddingExecutor
+from utils.retrieval_cache import RetrievalCache
+from utils.embedding import version_key
+from utils.reranking import rerank
+from utils.llm_streaming import StreamStats, stream_response
+from utils.llm_cache import LRUCache, TieredLLMCache
+from utils.context import assemble_context
+from utils.resources import get_resource
+from utils.jobs import enqueue, get_status
 
 from langchain_redis import RedisConfig, RedisVectorStore
-from langchain_huggingface import HuggingFaceEmbeddings
 
 from langchain_core.messages import HumanMessage, SystemMessage
-from langchain_google_genai import ChatGoogleGenerativeAI
 from langchain_redis import RedisCache
 from langchain_redis import RedisSemanticCache
 from langchain.globals import set_llm_cache
 
-from streamlit_extras.metric_cards import style_metric_cards
-
 st.set_page_config(layout="wide", page_title="Redis-Chat-Go")
 
-time_parse, time_save, time_search, time_llm = 0, 0, 0, 0
+time_save, time_search, time_llm = 0, 0, 0
 
 main_sidebar = st.sidebar
 with main_sidebar:
@@ -39,9 +42,6 @@ with main_sidebar:
     """
     st.markdown(center_img, unsafe_allow_html=True)
 
-
-embeddings = HuggingFaceEmbeddings()
-
 style = """
 <style>
 @font-face {
@@ -104,6 +104,18 @@ redis_host = config_obj['REDIS_INFO']['host']
 redis_port = config_obj['REDIS_INFO']['port']
 redis_user = config_obj['REDIS_INFO']['user']
 redis_pass = config_obj['REDIS_INFO']['password']
+cleanup_on_start = config_obj.getboolean('INGEST_INFO', 'cleanup_on_start', fallback=False)
+background_ingestion = config_obj.getboolean('INGEST_INFO', 'background', fallback=False)
+embedding_batch_size = config_obj.getint('EMBEDDING_INFO', 'batch_size', fallback=32)
+embedding_processes = config_obj.getint('EMBEDDING_INFO', 'processes', fallback=0)
+retrieval_k = config_obj.getint('RETRIEVAL_INFO', 'k', fallback=4)
+rerank_method = config_obj.get('RETRIEVAL_INFO', 'rerank', fallback='none')
+fetch_multiplier = config_obj.getint('RETRIEVAL_INFO', 'fetch_multiplier', fallback=4)
+lambda_mult = config_obj.getfloat('RETRIEVAL_INFO', 'lambda_mult', fallback=0.5)
+llm_cache_lru_size = config_obj.getint('LLM_CACHE_INFO', 'lru_size', fallback=256)
+llm_cache_ttl = config_obj.getint('LLM_CACHE_INFO', 'ttl', fallback=3600)
+semantic_threshold = config_obj.getfloat('LLM_CACHE_INFO', 'semantic_threshold', fallback=0.2)
+context_token_budget = config_obj.getint('CONTEXT_INFO', 'token_budget', fallback=1500)
 
 REDIS_URL = f"redis://default:{redis_pass}@{redis_host}:{redis_port}"
 
@@ -111,137 +123,157 @@ if "GOOGLE_API_KEY" not in os.environ:
     os.environ["GOOGLE_API_KEY"] = config_obj['GCP_INFO']['gcp_api_key']
 
 
+# Everything below is built once per process (utils/resources.py) and reused by every
+# rerun and session; reset_resources() drops them so they're built again.
 
-def typewriter(text: str, speed: int):
-    tokens = text.split()
-    container = st.empty()
-    for index in range(len(tokens) + 1):
-        curr_full_text = " ".join(tokens[:index])
-        container.markdown(curr_full_text)
-        time.sleep(1 / speed)
+def load_db_client():
+    return get_resource("db_client", lambda: redis.Redis(host=redis_host, port=redis_port, password=redis_pass, decode_responses=True))
 
-def load_vector_store():
-    config = RedisConfig(
-        index_name="idx:web",
-        redis_url=REDIS_URL,
-        metadata_schema=[
-            {"name": "id", "type": "text"},
-            {"name": "url", "type": "text"},
-            {"name": "filetype", "type": "text"},
-            {"name": "languages", "type": "tag"}
-        ]
-    )
-    vector_store = RedisVectorStore(embeddings, config=config)
-    return vector_store
-
-def load_chat_model(use_cache):
-
-    if use_cache == "Use Cache":
-        redis_cache = RedisCache(redis_url=REDIS_URL, ttl=3600)
-    else:
-        redis_cache = RedisSemanticCache(redis_url=REDIS_URL, embeddings=embeddings, distance_threshold=0.2, ttl=3600)
+def load_cache_client():
+    return get_resource("cache_client", lambda: redis.Redis(host=redis_host, port=redis_port, password=redis_pass))
 
-    set_llm_cache(redis_cache)
+def load_embeddings():
+    def create():
+        from langchain_huggingface import HuggingFaceEmbeddings
+        def create_executor():
+            executor = EmbeddingExecutor(HuggingFaceEmbeddings(), batch_size=embedding_batch_size,
+                                         processes=embedding_processes)
+            # Created once per process (reruns reuse it); its worker pool is stopped on exit
+            atexit.register(executor.shutdown)
+            return executor
 
-    llm = ChatGoogleGenerativeAI(
-        model="gemini-1.5-pro",
-        temperature=0.5,
-        top_p=0.95,
-        top_k=64,
-        max_output_tokens=8192
-        )
+        embedding_executor = get_resource("embedding_executor", create_executor)
+        return CachedEmbeddings(embedding_executor, client=load_cache_client(), max_size=10000)
+    return get_resource("embeddings", create)
 
-    return llm
+def load_vector_store():
+    def create():
+        # Only the first run in the process cleans up, not every rerun
+        if cleanup_on_start:
+            vector_db_cleanup()
+        config = RedisConfig(
+            index_name="idx:web",
+            redis_url=REDIS_URL,
+            metadata_schema=[
+                {"name": "id", "type": "text"},
+                {"name": "url", "type": "text"},
+                {"name": "chunk_index", "type": "numeric"},
+                {"name": "filetype", "type": "text"},
+                {"name": "languages", "type": "tag"}
+            ]
+        )
+        return RedisVectorStore(load_embeddings(), config=config)
+    return get_resource("vector_store", create)
+
+def load_retrieval_cache():
+    # Shared by all sessions and reruns; ingesting a page invalidates it
+    return get_resource("retrieval_cache", lambda: RetrievalCache(ttl=600, max_size=1024))
+
+def search_page(user_input, query_vector):
+    if rerank_method == "none":
+        return vector_store.similarity_search_with_score(user_input, k=retrieval_k)
+
+    # Over-fetch, then keep a diverse top k. The candidate vectors come from the
+    # embeddings cache, since every chunk was embedded at ingestion time.
+    candidates = vector_store.similarity_search_with_score(user_input, k=retrieval_k * fetch_multiplier)
+    if not candidates:
+        return candidates
+    vectors = embeddings.embed_documents([node[0].page_content for node in candidates])
+    selected = rerank(query_vector, vectors, retrieval_k, method=rerank_method, lambda_mult=lambda_mult)
+    return [candidates[i] for i in selected]
+
+def load_llm_cache():
+    # Exact match in the process, then exact match in Redis, then semantic match in Redis.
+    # Set once per process: the cache is global to LangChain, not per session.
+    def create():
+        llm_cache = TieredLLMCache([
+            ("lru", LRUCache(max_size=llm_cache_lru_size)),
+            ("redis", RedisCache(redis_url=REDIS_URL, ttl=llm_cache_ttl)),
+            ("semantic", RedisSemanticCache(redis_url=REDIS_URL, embeddings=load_embeddings(), distance_threshold=semantic_threshold, ttl=llm_cache_ttl)),
+        ])
+        set_llm_cache(llm_cache)
+        return llm_cache
+    return get_resource("llm_cache", create)
+
+def load_chat_model():
+    def create():
+        from langchain_google_genai import ChatGoogleGenerativeAI
+        return ChatGoogleGenerativeAI(
+            model="gemini-1.5-pro",
+            temperature=0.5,
+            top_p=0.95,
+            top_k=64,
+            max_output_tokens=8192
+            )
+    return get_resource("chat_model", create)
 
 def vector_db_cleanup():
-    db_client = redis.Redis(host=redis_host, port=redis_port, password=redis_pass, decode_responses=True)
+    db_client = load_db_client()
     try:
         for key in db_client.scan_iter("idx:*"):
-            db_client.delete(key)
+            # The version only ever goes up: deleting it would let it come back to a value
+            # that entries cached (by this or another process) before the cleanup still have
+            if key != version_key("idx:web"):
+                db_client.delete(key)
+        db_client.incr(version_key("idx:web"))
+        load_retrieval_cache().invalidate()
         db_client.ft("idx:web").dropindex()
     except Exception as e:
         print(f"Index not found.")
 
 
 with st.spinner("Connecting to Vector Database"):
-    vector_db_cleanup()
-    vector_store = load_vector_store()
+    db_client = load_db_client()
+    retrieval_cache = load_retrieval_cache()
 
 ## INPUT FOR WEB SITE URL
 
-input_panel = st.container()
-with input_panel:
-    panel1, na = st.columns([0.99,0.01])
-    with panel1:
-        use_cache = st.radio(
-            "Use Cache?",
-            ["Use Cache", "Use Semantic Cache (20%)"],
-            index=0,
-            key=None,
-            help=None,
-            on_change=None,
-            args=None,
-            kwargs=None,
-            disabled=False,
-            horizontal=True,
-            captions=None,
-            label_visibility="hidden")
-
 url_input = st.text_input(label="Enter the URL to the page you definitely don't want to read:", key="url_input")
 
 if url_input:
-    with st.spinner("Reading the page for you, beloved lazy person..."):
-            timer_start = time.perf_counter()
-            acceptable_types = ["NarrativeText", "List", "ListItem"]
-            elements = partition_html(url=url_input)
-            output_list = rag_document()
-            for element in elements:
-                el = element.to_dict()
-                el_type = el["type"]
-                if el_type in acceptable_types:
-                    if len(el["text"]) >= 20:
-                        output_list.append(element.to_dict())
-
-            elements_raw = dict_to_elements(output_list)
-            chunking_settings = {
-                "combine_text_under_n_chars": 50,
-                "max_characters": 750,
-                "new_after_n_chars": 500
-            }
-            chunked_raw = chunk_by_title(elements=elements_raw, **chunking_settings)
-            chunk_results = convert_to_dict(chunked_raw)
-
-            counter = 0
-            texts = []
-            metadata = []
-
-            for document in chunk_results:
-                counter = counter + 1
-                texts.append(document['text'])
-                metadata_obj = {
-                                "id": f"webdoc:{counter:05}",
-                                "url": document["metadata"]["url"],
-                                "filetype": document["metadata"]["filetype"],
-                                "languages": document["metadata"]["languages"],
-                                }
-                metadata.append(metadata_obj)
-
-            timer_end = time.perf_counter()
-            time_parse = round(timer_end - timer_start, 4)
-
+    # Heavy imports (unstructured, streamlit_extras) and the embeddings model are only
+    # paid once a page is read, not when the app is first opened
+    from streamlit_extras.metric_cards import style_metric_cards
+
+    with st.spinner("Loading the embeddings model"):
+        embeddings = load_embeddings()
+        llm_cache = load_llm_cache()
+        vector_store = load_vector_store()
+
+    if background_ingestion:
+        # The page is read by ingest_worker.py: enqueue it once per session, then poll the
+        # job status on each rerun, so the session isn't blocked while the page is ingested
+        ingest_jobs = st.session_state.setdefault("ingest_jobs", {})
+        if url_input not in ingest_jobs:
+            ingest_jobs[url_input] = enqueue(db_client, url_input, index_name="idx:web")
+        job = get_status(db_client, ingest_jobs[url_input])
+        if job.get("status") == "failed":
+            st.error(f"Couldn't read the page: {job.get('error')}")
+            st.stop()
+        if job.get("status") != "done":
+            st.text(f"Reading the page for you in the background, beloved lazy person... "
+                    f"({job.get('status', 'queued')}, {job.get('chunks', 0)} chunks so far)")
+            time.sleep(1)
+            st.rerun()
+        sync_result = {name: int(job.get(name, 0)) for name in ("added", "skipped", "removed")}
+        time_save = round(float(job["finished"]) - float(job["created"]), 4)
+    else:
+        from utils.ingest import ingest_page
+        with st.spinner("Reading the page for you, beloved lazy person..."):
             timer_start = time.perf_counter()
-            doc_ids = vector_store.add_texts(texts, metadata)
+            sync_result = ingest_page(db_client, vector_store, embeddings, url_input, batch_size=embedding_batch_size)
             timer_end = time.perf_counter()
-
             time_save = round(timer_end - timer_start, 4)
-            with main_sidebar:
-                dash_2 = st.container()
-                with dash_2:
-                    panel1, na = st.columns([0.99,0.01])
-                    panel1.metric(label="Vector DB Insert Time (sec)", value=time_save, delta=None)
-                    style_metric_cards()
 
-    st.text(f"Success! {len(doc_ids)} documents inserted in the Vector Database!")
+    with main_sidebar:
+        dash_2 = st.container()
+        with dash_2:
+            panel1, na = st.columns([0.99,0.01])
+            panel1.metric(label="Page Ingestion Time (sec)", value=time_save, delta=None)
+            style_metric_cards()
+
+    st.text(f"Success! {sync_result['added']} documents inserted in the Vector Database! "
+            f"({sync_result['skipped']} unchanged, {sync_result['removed']} removed)")
 
     st.divider()
 
@@ -250,7 +282,9 @@ if url_input:
 
         with st.spinner("Searching the Vector Database"):
             timer_start = time.perf_counter()
-            result_nodes = vector_store.similarity_search_with_score(user_input)
+            query_vector = embeddings.embed_query(user_input)
+            result_nodes = retrieval_cache.get_or_search(db_client, "idx:web", query_vector,
+                                                         lambda: search_page(user_input, query_vector))
             timer_end = time.perf_counter()
 
             time_search = round(timer_end - timer_start, 4)
@@ -260,23 +294,17 @@ if url_input:
                 with dash_3:
                     panel1, na = st.columns([0.99,0.01])
                     panel1.metric(label="Vector DB Search Time (sec)", value=time_search, delta=None)
+                    panel1.metric(label="Embedding Cache Hit Rate", value=f"{embeddings.hit_rate():.0%}", delta=None)
+                    panel1.metric(label="Retrieval Cache Hit Rate", value=f"{retrieval_cache.hit_rate():.0%}", delta=None)
                     style_metric_cards()
+            print(f"--> Embedding cache: {embeddings.stats}")
 
         total_results = len(result_nodes)
         st.text(f"[Found {total_results} results in the Vector Database]")
 
-        text_list = []
-        distance_list = []
-
-        if use_cache == "Use Cache":
-            spinner_text = "Getting a Response from the LLM - using Redis Cache"
-        else:
-            spinner_text = "Getting a Response from the LLM - using Redis Semantic Cache"
-        with st.spinner(spinner_text):
-            for node in result_nodes:
-                text_list.append(node[0].page_content)
-                distance = node[1]
-                distance_list.append(distance)
+        with st.spinner("Getting a Response from the LLM - using Redis Cache and Semantic Cache"):
+            # Most relevant passages first, adjacent chunks merged, capped at the token budget
+            context, context_tokens = assemble_context(result_nodes, token_budget=context_token_budget)
 
             # Get a consolidated response from the LLM
             st.subheader("Response from the Large Language Model", divider="rainbow")
@@ -294,25 +322,32 @@ if url_input:
             llm_response_container = st.empty()
 
             messages = [
-                SystemMessage(content=system_template.format(context=text_list)),
+                SystemMessage(content=system_template.format(context=context)),
                 HumanMessage(content=user_input)
             ]
 
-            llm = load_chat_model(use_cache)
+            llm = load_chat_model()
 
-            timer_start = time.perf_counter()
-            llm_response = llm.invoke(messages)
-            timer_end = time.perf_counter()
-            #typewriter(text=llm_response.content, speed=20)
-            st.markdown(llm_response.content)
+            # Tokens are rendered as Gemini generates them; cached responses come back in one piece
+            llm_stats = StreamStats()
+            with llm_response_container.container():
+                st.write_stream(stream_response(llm, messages, llm_stats))
 
-            time_llm = round(timer_end - timer_start, 4)
+            time_llm = llm_stats.total_time
+            print(f"--> LLM cache: {llm_cache.stats}")
 
             with main_sidebar:
                 dash_4 = st.container()
                 with dash_4:
                     panel1, na = st.columns([0.99,0.01])
                     panel1.metric(label="LLM Time (sec)", value=time_llm, delta=None)
+                    panel1.metric(label="Context Tokens", value=context_tokens, delta=None)
+                    panel1.metric(label="Time to First Token (sec)", value=llm_stats.time_to_first_token, delta=None)
+                    panel1.metric(label="Tokens per Second",
+                                  value="N/A" if llm_stats.cached else llm_stats.tokens_per_second, delta=None)
+                    panel1.metric(label="LLM Cache Hit Rate (LRU / Redis / Semantic)",
+                                  value=" / ".join(f"{llm_cache.hit_rate(tier):.0%}" for tier in ("lru", "redis", "semantic")),
+                                  delta=None)
                     style_metric_cards()
 
             st.divider()
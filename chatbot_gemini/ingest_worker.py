@@ -0,0 +1,94 @@
+"""Background ingestion workers for the job queue in utils/jobs.py.
+
+Each worker process loads its own embeddings model and consumes URLs from the
+ingest:jobs stream (consumer group ingest-workers), so throughput grows with the
+number of workers. Start as many as you need, on one or several machines:
+
+    python ingest_worker.py --workers 2
+"""
+import os
+import argparse
+import multiprocessing
+
+os.environ["PYDANTIC_SKIP_VALIDATING_CORE_SCHEMAS"] = "True"
+
+import redis
+from configparser import ConfigParser
+
+from utils.jobs import run_worker
+
+
+def load_worker():
+    # Returns the Redis client and the job handler; the heavy imports happen here, in the
+    # worker process, not in the parent that starts the workers
+    from langchain_huggingface import HuggingFaceEmbeddings
+    from langchain_redis import RedisConfig, RedisVectorStore
+    from utils.embedding_cache import CachedEmbeddings
+    from utils.ingest import ingest_page
+
+    config_obj = ConfigParser()
+    config_obj.read("./config.ini")
+    redis_host = config_obj['REDIS_INFO']['host']
+    redis_port = config_obj['REDIS_INFO']['port']
+    redis_pass = config_obj['REDIS_INFO']['password']
+    embedding_batch_size = config_obj.getint('EMBEDDING_INFO', 'batch_size', fallback=32)
+
+    REDIS_URL = f"redis://default:{redis_pass}@{redis_host}:{redis_port}"
+    db_client = redis.Redis(host=redis_host, port=redis_port, password=redis_pass, decode_responses=True)
+    cache_client = redis.Redis(host=redis_host, port=redis_port, password=redis_pass)
+
+    # The workers are the parallelism, so each one embeds in its own process
+    embeddings = CachedEmbeddings(HuggingFaceEmbeddings(), client=cache_client, max_size=10000)
+    vector_stores = {}
+
+    def handler(url, index_name, progress):
+        if index_name not in vector_stores:
+            config = RedisConfig(
+                index_name=index_name,
+                redis_url=REDIS_URL,
+                metadata_schema=[
+                    {"name": "id", "type": "text"},
+                    {"name": "url", "type": "text"},
+                    {"name": "chunk_index", "type": "numeric"},
+                    {"name": "filetype", "type": "text"},
+                    {"name": "languages", "type": "tag"}
+                ]
+            )
+            vector_stores[index_name] = RedisVectorStore(embeddings, config=config)
+        return ingest_page(db_client, vector_stores[index_name], embeddings, url, batch_size=embedding_batch_size,
+                           index_name=index_name, progress=progress)
+
+    return db_client, handler
+
+
+def worker_main(min_idle_ms, max_attempts):
+    db_client, handler = load_worker()
+    run_worker(db_client, handler, max_attempts=max_attempts, min_idle_ms=min_idle_ms)
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--workers", type=int, default=1)
+    parser.add_argument("--min-idle-ms", type=int, default=60000, help="retry jobs stalled for this long")
+    parser.add_argument("--max-attempts", type=int, default=3)
+    args = parser.parse_args()
+
+    if args.workers == 1:
+        worker_main(args.min_idle_ms, args.max_attempts)
+        return
+
+    context = multiprocessing.get_context("spawn")
+    processes = [context.Process(target=worker_main, args=(args.min_idle_ms, args.max_attempts))
+                 for _ in range(args.workers)]
+    for process in processes:
+        process.start()
+    try:
+        for process in processes:
+            process.join()
+    except KeyboardInterrupt:
+        for process in processes:
+            process.terminate()
+
+
+if __name__ == "__main__":
+    main()
@@ -1,12 +1,15 @@
 import os
+import redis
+import uuid
 import streamlit as st
 from configparser import ConfigParser
 
-from langchain_redis import RedisChatMessageHistory
 from langchain_core.prompts import ChatPromptTemplate, MessagesPlaceholder
 from langchain_core.runnables.history import RunnableWithMessageHistory
 
-from langchain_google_genai import ChatGoogleGenerativeAI
+from utils.llm_streaming import StreamStats, stream_text
+from utils.chat_memory import BoundedChatMessageHistory
+from utils.resources import get_resource
 
 st.set_page_config(layout="wide", page_title="Redis-Chat-Go")
 
@@ -16,51 +19,82 @@ redis_host = config_obj['REDIS_INFO']['host']
 redis_port = config_obj['REDIS_INFO']['port']
 redis_user = config_obj['REDIS_INFO']['user']
 redis_pass = config_obj['REDIS_INFO']['password']
+memory_mode = config_obj.get('CHAT_MEMORY_INFO', 'mode', fallback='bounded')
+memory_max_turns = config_obj.getint('CHAT_MEMORY_INFO', 'max_turns', fallback=6)
+memory_fold_every = config_obj.getint('CHAT_MEMORY_INFO', 'fold_every', fallback=4)
+memory_max_messages = config_obj.getint('CHAT_MEMORY_INFO', 'max_messages', fallback=200)
+memory_ttl = config_obj.getint('CHAT_MEMORY_INFO', 'ttl', fallback=3600)
+summary_model = config_obj.get('CHAT_MEMORY_INFO', 'summary_model', fallback='gemini-1.5-flash')
 
 REDIS_URL = f"redis://default:{redis_pass}@{redis_host}:{redis_port}"
 
 if "GOOGLE_API_KEY" not in os.environ:
     os.environ["GOOGLE_API_KEY"] = config_obj['GCP_INFO']['gcp_api_key']
 
-# Initialize RedisChatMessageHistory
-user_session = "default"
 
-llm = ChatGoogleGenerativeAI(
-    model="gemini-1.5-pro",
-    temperature=0.5,
-    top_p=0.95,
-    top_k=64,
-    max_output_tokens=8192
-    )
+# Clients, models and chains are built once per process (utils/resources.py) and shared
+# with the other pages, instead of on every rerun
 
-# Create a conversational chain
-prompt = ChatPromptTemplate.from_messages([
-    ("system", "You are a helpful AI assistant."),
-    MessagesPlaceholder(variable_name="history"),
-    ("human", "{input}")
-])
-chain = prompt | llm
+def load_db_client():
+    return get_resource("db_client", lambda: redis.Redis(host=redis_host, port=redis_port, password=redis_pass, decode_responses=True))
 
+def load_chat_model():
+    def create():
+        from langchain_google_genai import ChatGoogleGenerativeAI
+        return ChatGoogleGenerativeAI(
+            model="gemini-1.5-pro",
+            temperature=0.5,
+            top_p=0.95,
+            top_k=64,
+            max_output_tokens=8192
+            )
+    return get_resource("chat_model", create)
 
-# Function to get or create a RedisChatMessageHistory instance
-def get_redis_history(session_id: str):
-    return RedisChatMessageHistory(session_id, redis_url=REDIS_URL, ttl=3600)
+def load_summarizer():
+    # Cheaper model that folds old turns into the rolling summary (bounded mode only)
+    def create():
+        from langchain_google_genai import ChatGoogleGenerativeAI
+        return ChatGoogleGenerativeAI(model=summary_model, temperature=0)
+    return get_resource(f"summarizer:{summary_model}", create)
 
-# Create a runnable with message history
-chain_with_history = RunnableWithMessageHistory(
-    chain,
-    get_redis_history,
-    input_messages_key="input",
-    history_messages_key="history"
-)
 
-def generate_response(input_text, user_session):
-    response = chain_with_history.invoke({"input": input_text}, config={"configurable": {"session_id": user_session}})
-    return response.content
+# Function to get or create a RedisChatMessageHistory instance
+def get_redis_history(session_id: str):
+    if memory_mode == "full":
+        from langchain_redis import RedisChatMessageHistory
+        return RedisChatMessageHistory(session_id, redis_url=REDIS_URL, ttl=memory_ttl)
+    # Last max_turns turns verbatim + a rolling summary, so the prompt stops growing
+    return BoundedChatMessageHistory(session_id, load_db_client(), load_summarizer(), max_turns=memory_max_turns,
+                                     fold_every=memory_fold_every, ttl=memory_ttl, max_messages=memory_max_messages)
+
+def load_chain_with_history():
+    def create():
+        # Create a conversational chain
+        prompt = ChatPromptTemplate.from_messages([
+            ("system", "You are a helpful AI assistant."),
+            MessagesPlaceholder(variable_name="history"),
+            ("human", "{input}")
+        ])
+        chain = prompt | load_chat_model()
+
+        # Create a runnable with message history
+        return RunnableWithMessageHistory(
+            chain,
+            get_redis_history,
+            input_messages_key="input",
+            history_messages_key="history"
+        )
+    return get_resource("chain_with_history", create)
+
+def generate_response(input_text, user_session, stats):
+    chunks = load_chain_with_history().stream({"input": input_text}, config={"configurable": {"session_id": user_session}})
+    return stream_text(chunks, stats)
 
 
 # Constants
 NUMBER_OF_MESSAGES_TO_DISPLAY = 20
+USER_IMAGE = "https://streamly.streamlit.app:443/~/+/media/af4f6547a2bed5f2155bcd7972b52f98441e3548ef0d1a0dca033dec.png"
+REDIS_IMAGE = "https://redis.io/wp-content/themes/wpx/assets/images/favicons/favicon-32x32.png?v=1720078588"
 
 def initialize_conversation():
     assistant_message = "Hello! How can I assist you today?"
@@ -78,6 +112,9 @@ def initialize_session_state():
         st.session_state.history = []
     if 'conversation_history' not in st.session_state:
         st.session_state.conversation_history = []
+    if 'session_id' not in st.session_state:
+        # One Redis history per browser session, so users don't share (and grow) each other's prompts
+        st.session_state.session_id = uuid.uuid4().hex
 
 
 def on_chat_submit(chat_input, user_session):
@@ -88,10 +125,14 @@ def on_chat_submit(chat_input, user_session):
 
     st.session_state.conversation_history.append({"role": "user", "content": user_input})
 
-    # response = generate_response(st.session_state.conversation_history, user_session)
-    response = generate_response(chat_input, user_session)
+    with st.chat_message("user", avatar=USER_IMAGE):
+        st.write(user_input)
 
-    assistant_reply = response
+    # response = generate_response(st.session_state.conversation_history, user_session)
+    with st.chat_message("assistant", avatar=REDIS_IMAGE):
+        stats = StreamStats()
+        assistant_reply = st.write_stream(generate_response(chat_input, user_session, stats))
+        st.caption(f"First token in {stats.time_to_first_token}s, {stats.tokens_per_second} tokens/sec")
 
     st.session_state.conversation_history.append({"role": "assistant", "content": assistant_reply})
     st.session_state.history.append({"role": "user", "content": user_input})
@@ -135,21 +176,20 @@ def main():
 
     #st.toggle("Keep Chat History", value=True, on_change=load_chat_model)
 
-    chat_input = st.chat_input("Ask me anything")
-    if chat_input:
-        on_chat_submit(chat_input, user_session)
-
     # Display chat history
     for message in st.session_state.history[-NUMBER_OF_MESSAGES_TO_DISPLAY:]:
         role = message["role"]
-
-        user_image = "https://streamly.streamlit.app:443/~/+/media/af4f6547a2bed5f2155bcd7972b52f98441e3548ef0d1a0dca033dec.png"
-        redis_image = "https://redis.io/wp-content/themes/wpx/assets/images/favicons/favicon-32x32.png?v=1720078588"
-        avatar_image = redis_image if role == "assistant" else user_image if role == "user" else None
+        avatar_image = REDIS_IMAGE if role == "assistant" else USER_IMAGE if role == "user" else None
 
         with st.chat_message(role, avatar=avatar_image):
             st.write(message["content"])
 
+    # New messages are rendered below the history, with the answer streamed as it's generated
+    chat_input = st.chat_input("Ask me anything")
+    if chat_input:
+        on_chat_submit(chat_input, st.session_state.session_id)
+
+
 
 if __name__ == "__main__":
     main()
@@ -4,7 +4,8 @@ import random
 import streamlit as st
 from configparser import ConfigParser
 
-from langchain_google_genai import ChatGoogleGenerativeAI
+from utils.llm_streaming import StreamStats, stream_text
+from utils.resources import get_resource
 
 st.set_page_config(layout="wide", page_title="Redis-Chat-Go")
 
@@ -23,21 +24,29 @@ if "GOOGLE_API_KEY" not in os.environ:
 # Initialize RedisChatMessageHistory
 user_session = ''.join(random.choices(string.ascii_letters, k=7))
 
-llm = ChatGoogleGenerativeAI(
-    model="gemini-1.5-pro",
-    temperature=0.5,
-    top_p=0.95,
-    top_k=64,
-    max_output_tokens=8192
-    )
+def load_chat_model():
+    # Built once per process and shared with the other pages (utils/resources.py).
+    # langchain_google_genai is imported on first use, not when the page loads.
+    def create():
+        from langchain_google_genai import ChatGoogleGenerativeAI
+        return ChatGoogleGenerativeAI(
+            model="gemini-1.5-pro",
+            temperature=0.5,
+            top_p=0.95,
+            top_k=64,
+            max_output_tokens=8192
+            )
+    return get_resource("chat_model", create)
 
 
-def generate_response(input_text):
-    return llm.invoke(input_text)
+def generate_response(input_text, stats):
+    return stream_text(load_chat_model().stream(input_text), stats)
 
 
 # Constants
 NUMBER_OF_MESSAGES_TO_DISPLAY = 20
+USER_IMAGE = "https://streamly.streamlit.app:443/~/+/media/af4f6547a2bed5f2155bcd7972b52f98441e3548ef0d1a0dca033dec.png"
+REDIS_IMAGE = "https://redis.io/wp-content/themes/wpx/assets/images/favicons/favicon-32x32.png?v=1720078588"
 
 def initialize_conversation():
     assistant_message = "Hello! How can I assist you today?"
@@ -58,7 +67,6 @@ def initialize_session_state():
 
 
 
-@st.cache_data(show_spinner=False)
 def on_chat_submit(chat_input):
     user_input = chat_input.strip().lower()
 
@@ -67,9 +75,13 @@ def on_chat_submit(chat_input):
 
     st.session_state.conversation_history.append({"role": "user", "content": user_input})
 
-    response = generate_response(user_input)
+    with st.chat_message("user", avatar=USER_IMAGE):
+        st.write(user_input)
 
-    assistant_reply = response.content
+    with st.chat_message("assistant", avatar=REDIS_IMAGE):
+        stats = StreamStats()
+        assistant_reply = st.write_stream(generate_response(user_input, stats))
+        st.caption(f"First token in {stats.time_to_first_token}s, {stats.tokens_per_second} tokens/sec")
 
     st.session_state.conversation_history.append({"role": "assistant", "content": assistant_reply})
     st.session_state.history.append({"role": "user", "content": user_input})
@@ -112,21 +124,20 @@ def main():
         st.session_state.conversation_history = initialize_conversation()
 
 
-    chat_input = st.chat_input("Ask me anything")
-    if chat_input:
-        on_chat_submit(chat_input)
-
     # Display chat history
     for message in st.session_state.history[-NUMBER_OF_MESSAGES_TO_DISPLAY:]:
         role = message["role"]
-
-        user_image = "https://streamly.streamlit.app:443/~/+/media/af4f6547a2bed5f2155bcd7972b52f98441e3548ef0d1a0dca033dec.png"
-        redis_image = "https://redis.io/wp-content/themes/wpx/assets/images/favicons/favicon-32x32.png?v=1720078588"
-        avatar_image = redis_image if role == "assistant" else user_image if role == "user" else None
+        avatar_image = REDIS_IMAGE if role == "assistant" else USER_IMAGE if role == "user" else None
 
         with st.chat_message(role, avatar=avatar_image):
             st.write(message["content"])
 
+    # New messages are rendered below the history, with the answer streamed as it's generated
+    chat_input = st.chat_input("Ask me anything")
+    if chat_input:
+        on_chat_submit(chat_input)
+
+
 
 if __name__ == "__main__":
     main()
\ No newline at end of file
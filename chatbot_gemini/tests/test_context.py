@@ -0,0 +1,69 @@
+"""Context assembly on real search results from a Redis Stack instance.
+
+Run from the chatbot_gemini folder with `python -m pytest tests`. Skipped when the
+Redis in config.ini isn't reachable.
+"""
+import sys
+import uuid
+from pathlib import Path
+from configparser import ConfigParser
+
+import pytest
+
+APP_DIR = Path(__file__).resolve().parent.parent
+if str(APP_DIR) not in sys.path:
+    sys.path.insert(0, str(APP_DIR))
+
+redis = pytest.importorskip("redis")
+langchain_redis = pytest.importorskip("langchain_redis")
+from langchain_core.embeddings import DeterministicFakeEmbedding
+
+from utils.context import assemble_context, chunk_position
+from utils.ingest import chunk_hash, chunk_metadata
+
+
+@pytest.fixture
+def vector_store():
+    config_obj = ConfigParser()
+    config_obj.read(APP_DIR / "config.ini")
+    redis_host = config_obj['REDIS_INFO']['host']
+    redis_port = config_obj['REDIS_INFO']['port']
+    redis_pass = config_obj['REDIS_INFO']['password']
+    client = redis.Redis(host=redis_host, port=redis_port, password=redis_pass, decode_responses=True)
+    try:
+        client.ping()
+    except redis.exceptions.ConnectionError:
+        pytest.skip("Redis is not reachable")
+
+    index_name = f"idx:test_context_{uuid.uuid4().hex[:8]}"
+    config = langchain_redis.RedisConfig(
+        index_name=index_name,
+        redis_url=f"redis://default:{redis_pass}@{redis_host}:{redis_port}",
+        metadata_schema=[
+            {"name": "id", "type": "text"},
+            {"name": "url", "type": "text"},
+            {"name": "chunk_index", "type": "numeric"},
+            {"name": "filetype", "type": "text"},
+            {"name": "languages", "type": "tag"}
+        ]
+    )
+    store = langchain_redis.RedisVectorStore(DeterministicFakeEmbedding(size=16), config=config)
+    yield store
+    store.index.delete(drop=True)
+
+
+def test_adjacent_chunks_are_merged_from_search_results(vector_store):
+    url = "https://example.com/page"
+    texts = ["first part of a paragraph", "second part of the paragraph", "an unrelated section", "the footer"]
+    metadata = [chunk_metadata({"metadata": {"url": url, "filetype": "text/html", "languages": ["eng"]}}, position)
+                for position in range(1, len(texts) + 1)]
+    vector_store.add_texts(texts, metadata, keys=[chunk_hash(url, text) for text in texts])
+
+    results = vector_store.similarity_search_with_score(texts[0], k=len(texts))
+    # The chunk's "id" field is replaced by the document key in search results; chunk_index isn't
+    assert sorted(chunk_position(doc) for doc, _ in results) == [1, 2, 3, 4]
+
+    context, tokens = assemble_context(results, token_budget=10000)
+    assert context.count("Source:") == 1
+    assert context.index(texts[0]) < context.index(texts[1]) < context.index(texts[2]) < context.index(texts[3])
+    assert tokens > 0
@@ -0,0 +1,103 @@
+import json
+from redis.exceptions import WatchError
+from langchain_core.chat_history import BaseChatMessageHistory
+from langchain_core.messages import SystemMessage, HumanMessage, message_to_dict, messages_from_dict
+
+SUMMARY_PROMPT = """Progressively summarize the conversation below, adding to the previous summary.
+Keep names, numbers and decisions; drop greetings and small talk. Reply with the new summary only.
+
+Previous summary:
+{summary}
+
+New lines of conversation:
+{lines}
+"""
+
+
+class BoundedChatMessageHistory(BaseChatMessageHistory):
+    """Chat history that keeps the last max_turns turns verbatim in a Redis LIST.
+
+    Older turns are folded into a rolling summary (a Redis string, written by the
+    summarizer LLM) fold_every turns at a time, so the history sent with each prompt
+    stays between max_turns and max_turns + fold_every turns plus the summary.
+    Appends are atomic (MULTI), and max_messages caps the list even if folding fails.
+    A fold is committed with WATCH on both keys, after the summarizer has run.
+    The Redis client must use decode_responses=True.
+    """
+
+    def __init__(self, session_id, client, summarizer, max_turns=6, fold_every=4, ttl=3600, key_prefix="chat:",
+                 max_messages=200, fold_retries=3):
+        self.session_id = session_id
+        self.client = client
+        self.summarizer = summarizer
+        self.max_turns = max_turns
+        self.fold_every = fold_every
+        self.ttl = ttl
+        self.max_messages = max_messages
+        self.fold_retries = fold_retries
+        self.messages_key = f"{key_prefix}{session_id}:messages"
+        self.summary_key = f"{key_prefix}{session_id}:summary"
+
+    @property
+    def messages(self):
+        pipeline = self.client.pipeline()
+        pipeline.get(self.summary_key)
+        pipeline.lrange(self.messages_key, 0, -1)
+        summary, stored = pipeline.execute()
+        messages = messages_from_dict([json.loads(item) for item in stored])
+        if summary:
+            return [SystemMessage(content=f"Summary of the earlier conversation:\n{summary}")] + messages
+        return messages
+
+    def get_summary(self):
+        return self.client.get(self.summary_key) or ""
+
+    def add_messages(self, messages):
+        # One MULTI per turn, so the question and answer stay together even when
+        # several tabs of the same session write at once
+        pipeline = self.client.pipeline()
+        pipeline.rpush(self.messages_key, *[json.dumps(message_to_dict(message)) for message in messages])
+        pipeline.ltrim(self.messages_key, -self.max_messages, -1)
+        if self.ttl:
+            pipeline.expire(self.messages_key, self.ttl)
+            pipeline.expire(self.summary_key, self.ttl)
+        length = min(pipeline.execute()[0], self.max_messages)
+        # Two messages per turn (human + ai)
+        if length > 2 * (self.max_turns + self.fold_every):
+            self.fold(length - 2 * self.max_turns)
+
+    def fold(self, count):
+        # The summarizer call is slow, so it runs outside the transaction. The result is
+        # only committed if the summary and the folded messages are still what it read:
+        # otherwise another writer folded (or trimmed) them first, and the next append
+        # folds again if needed.
+        previous = self.client.get(self.summary_key)
+        stored = self.client.lrange(self.messages_key, 0, count - 1)
+        if not stored:
+            return
+        lines = []
+        for message in messages_from_dict([json.loads(item) for item in stored]):
+            role = "User" if isinstance(message, HumanMessage) else "Assistant"
+            lines.append(f"{role}: {message.content}")
+        summary = self.summarizer.invoke(SUMMARY_PROMPT.format(summary=previous or "(none)", lines="\n".join(lines)))
+
+        with self.client.pipeline() as pipeline:
+            for _ in range(self.fold_retries):
+                try:
+                    pipeline.watch(self.summary_key, self.messages_key)
+                    if pipeline.get(self.summary_key) != previous or \
+                            pipeline.lrange(self.messages_key, 0, len(stored) - 1) != stored:
+                        print(f"--> History of {self.session_id} was folded by another writer")
+                        return
+                    pipeline.multi()
+                    pipeline.set(self.summary_key, getattr(summary, "content", summary), ex=self.ttl or None)
+                    pipeline.ltrim(self.messages_key, len(stored), -1)
+                    pipeline.execute()
+                    return
+                except WatchError:
+                    # Most likely a turn appended in the meantime: check again
+                    continue
+        print(f"--> Gave up folding the history of {self.session_id} after {self.fold_retries} conflicts")
+
+    def clear(self):
+        self.client.delete(self.messages_key, self.summary_key)
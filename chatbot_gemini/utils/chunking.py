@@ -18,3 +18,16 @@ def chunk(input_data):
     elements = chunk_docs_unstruct(elements_raw)
     print(f"--> Generated {len(elements)} chunks")
     return elements
+
+
+def chunk_iter(elements, window=200):
+    # Chunks a stream of element dicts in windows of `window` elements. Titles are
+    # filtered out by the parser, so a window boundary only ends a chunk a bit early.
+    buffer = []
+    for element in elements:
+        buffer.append(element)
+        if len(buffer) >= window:
+            yield from chunk_docs_unstruct(dict_to_elements(buffer))
+            buffer = []
+    if buffer:
+        yield from chunk_docs_unstruct(dict_to_elements(buffer))
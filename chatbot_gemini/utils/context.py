@@ -0,0 +1,64 @@
+def estimate_tokens(text):
+    # Gemini counts tokens server-side only; ~4 characters per token is close enough for English
+    # text and keeps the budget check free. Pass llm.get_num_tokens to count exactly.
+    return (len(text) + 3) // 4
+
+
+def chunk_position(doc):
+    # Position on the page, written by utils/ingest.chunk_metadata. Redis returns it as a string.
+    try:
+        return int(float(doc.metadata["chunk_index"]))
+    except (KeyError, TypeError, ValueError):
+        return None
+
+
+def merge_adjacent(scored_docs):
+    # Groups chunks that are next to each other on the same page into one passage, so a
+    # paragraph split across two chunks reaches the LLM in one piece. Each passage keeps
+    # the best (lowest) distance of its chunks.
+    passages = []
+    by_url = {}
+    for doc, score in scored_docs:
+        position = chunk_position(doc)
+        if position is None:
+            passages.append({"url": doc.metadata.get("url"), "chunks": {0: doc.page_content}, "score": score})
+            continue
+        by_url.setdefault(doc.metadata.get("url"), []).append((position, doc.page_content, score))
+
+    for url, chunks in by_url.items():
+        chunks.sort()
+        current = None
+        for position, text, score in chunks:
+            if current is not None and position == current["last"] + 1:
+                current["chunks"][position] = text
+                current["score"] = min(current["score"], score)
+            else:
+                current = {"url": url, "chunks": {position: text}, "score": score}
+                passages.append(current)
+            current["last"] = position
+
+    for passage in passages:
+        chunks = passage.pop("chunks")
+        passage["text"] = "\n".join(chunks[position] for position in sorted(chunks))
+        passage.pop("last", None)
+    return sorted(passages, key=lambda passage: passage["score"])
+
+
+def assemble_context(scored_docs, token_budget=1500, count_tokens=estimate_tokens):
+    """Builds the prompt context from (Document, distance) pairs, most relevant first.
+
+    Adjacent chunks of the same URL are merged, and passages are added in order of
+    distance until token_budget is reached. Passages that don't fit are skipped, so a
+    smaller, less relevant one can still use the remaining budget.
+    Returns (context_text, tokens_used).
+    """
+    sections = []
+    used = 0
+    for passage in merge_adjacent(scored_docs):
+        section = f"[{len(sections) + 1}] Source: {passage['url']}\n{passage['text']}"
+        tokens = count_tokens(section)
+        if used + tokens > token_budget:
+            continue
+        sections.append(section)
+        used = used + tokens
+    return "\n\n".join(sections), used
@@ -1,57 +1,221 @@
 import os
+import re
 import json
+import time
+import uuid
+from datetime import datetime, timezone
 import redis
 import numpy as np
+from redis.client import NEVER_DECODE
 from configparser import ConfigParser
 from redis.commands.json.path import Path
 from redis.commands.search.query import Query
+from redis.commands.search.result import Result
 from redis.commands.search.indexDefinition import IndexDefinition, IndexType
 from redis.commands.search.field import NumericField, TagField, TextField, VectorField
+from utils import reranking
+
+
+INDEX_NAME = "idx:vecdoc"
+KEY_PREFIX = "vecdoc:"
+
+# Defaults for the HNSW graph. EF_RUNTIME can also be overridden per query.
+HNSW_DEFAULTS = {
+    "M": 16,
+    "EF_CONSTRUCTION": 200,
+    "EF_RUNTIME": 10,
+    "INITIAL_CAP": 10000,
+}
+
+VECTOR_TYPES = ("FLOAT32", "FLOAT16", "BFLOAT16")
+
+# Settings of each index (vector type, storage...), read from its settings hash (see create_index),
+# as index_name -> (settings, generation, time of the last check). Every create_index writes a new
+# generation, so a process notices when another one recreated the index with other settings.
+_index_settings = {}
+# Queries re-check the generation at most this often (seconds); writes check it every time
+SETTINGS_CHECK_INTERVAL = 1.0
 
 
 def initialize_db(client):
   try:
-    for key in client.scan_iter("vecdoc:*"):
+    for key in client.scan_iter(f"{KEY_PREFIX}*"):
       client.delete(key)
-    client.ft("idx:vecdoc").dropindex()
+    client.ft(INDEX_NAME).dropindex()
   except Exception as e:
     print(f"Index doesn't exist. Will create a new one.")
+  finally:
+    client.delete(settings_key(INDEX_NAME))
+    client.incr(version_key(INDEX_NAME))
+    _index_settings.pop(INDEX_NAME, None)
+
+
+def settings_key(index_name):
+    return f"{index_name}:settings"
+
+
+def version_key(index_name):
+    # Incremented on every write, so cached search results (see utils/retrieval_cache.py) go stale
+    return f"{index_name}:version"
+
+
+def encode_vector(values, vector_type="FLOAT32"):
+    vector = np.asarray(values, dtype=np.float32)
+    if vector_type == "FLOAT32":
+        return vector.tobytes()
+    if vector_type == "FLOAT16":
+        return vector.astype(np.float16).tobytes()
+    if vector_type == "BFLOAT16":
+        # numpy has no bfloat16: keep the top 16 bits of each float32, rounding to nearest even
+        bits = vector.view(np.uint32).astype(np.uint64)
+        rounded = (bits + 0x7FFF + ((bits >> 16) & 1)) >> 16
+        return rounded.astype(np.uint16).tobytes()
+    raise ValueError(f"Unknown vector type {vector_type}")
+
+
+def decode_vector(data, vector_type="FLOAT32"):
+    if vector_type == "FLOAT32":
+        return np.frombuffer(data, dtype=np.float32)
+    if vector_type == "FLOAT16":
+        return np.frombuffer(data, dtype=np.float16).astype(np.float32)
+    if vector_type == "BFLOAT16":
+        bits = np.frombuffer(data, dtype=np.uint16).astype(np.uint32) << 16
+        return bits.view(np.float32)
+    raise ValueError(f"Unknown vector type {vector_type}")
+
+
+# numpy dtype that can be sent as-is for each vector type (numpy has no bfloat16)
+NUMPY_DTYPES = {"FLOAT32": np.float32, "FLOAT16": np.float16}
+
+
+def query_vector_bytes(query_vector, vector_type="FLOAT32"):
+    # bytes and memoryviews are assumed to be already packed in the index vector type.
+    # A contiguous numpy array of the matching dtype is sent as a byte view of its
+    # buffer, without a copy. JSON strings (the original API) and lists get encoded.
+    if isinstance(query_vector, (bytes, bytearray)):
+        return bytes(query_vector) if isinstance(query_vector, bytearray) else query_vector
+    if isinstance(query_vector, memoryview):
+        return query_vector if query_vector.format == "B" else query_vector.cast("B")
+    if isinstance(query_vector, np.ndarray):
+        if query_vector.dtype == NUMPY_DTYPES.get(vector_type) and query_vector.flags.c_contiguous:
+            return memoryview(query_vector).cast("B")
+        return encode_vector(query_vector, vector_type)
+    if isinstance(query_vector, str):
+        query_vector = json.loads(query_vector)
+    return encode_vector(query_vector, vector_type)
+
+
+def cache_index_settings(index_name, settings):
+    settings = {
+        (k.decode("utf-8") if isinstance(k, bytes) else k): (v.decode("utf-8") if isinstance(v, bytes) else v)
+        for k, v in settings.items()
+    }
+    settings.setdefault("vector_type", "FLOAT32")
+    settings.setdefault("storage", "json")
+    _index_settings[index_name] = (settings, settings.get("generation"), time.monotonic())
+    return settings
+
+
+def cached_index_settings(index_name, max_age):
+    # The cached settings if they were checked less than max_age seconds ago
+    cached = _index_settings.get(index_name)
+    if cached is not None and time.monotonic() - cached[2] < max_age:
+        return cached[0]
+    return None
+
+
+def checked_index_settings(index_name, generation):
+    # The cached settings if they still are those of the given generation (None otherwise)
+    if isinstance(generation, bytes):
+        generation = generation.decode("utf-8")
+    cached = _index_settings.get(index_name)
+    if cached is None or cached[1] != generation:
+        return None
+    _index_settings[index_name] = (cached[0], generation, time.monotonic())
+    return cached[0]
 
 
-def create_index(client, VECTOR_DIMENSION):
+def get_index_settings(client, index_name=INDEX_NAME, max_age=SETTINGS_CHECK_INTERVAL):
+    settings = cached_index_settings(index_name, max_age)
+    if settings is None:
+        settings = checked_index_settings(index_name, client.hget(settings_key(index_name), "generation"))
+    if settings is None:
+        settings = cache_index_settings(index_name, client.hgetall(settings_key(index_name)))
+    return settings
+
+
+def get_vector_type(client, index_name=INDEX_NAME):
+    # Writes and queries always encode with the type the index was created with
+    return get_index_settings(client, index_name)["vector_type"]
+
+
+def create_index(client, VECTOR_DIMENSION, algorithm="FLAT", hnsw_params=None, index_name=INDEX_NAME, prefix=KEY_PREFIX, storage="json", vector_type="FLOAT32", published_numeric=False):
    
     # Create an index for the vectors
     result = "FAILED"
 
+    if vector_type not in VECTOR_TYPES:
+        return f"FAILED to create index: unknown vector type {vector_type}"
+
+    vector_attributes = {
+        "TYPE": vector_type,
+        "DIM": VECTOR_DIMENSION,
+        "DISTANCE_METRIC": "COSINE",
+    }
+    if algorithm == "HNSW":
+        vector_attributes.update(HNSW_DEFAULTS)
+        vector_attributes.update(hnsw_params or {})
+    elif algorithm != "FLAT":
+        return f"FAILED to create index: unknown algorithm {algorithm}"
+
+    if storage == "json":
+        path, index_type = "$.", IndexType.JSON
+    elif storage == "hash":
+        path, index_type = "", IndexType.HASH
+    else:
+        return f"FAILED to create index: unknown storage {storage}"
+
+    # Same aliases for both storage formats, so the queries work against either one
     schema = (
-        TextField("$.element_id", as_name="element_id"),
-        TagField("$.doc_id", as_name="doc_id"),
-        TagField("$.id", as_name="id"),
-        TextField("$.text", as_name="text"),
-        TextField("$.title", as_name="title"),
-        TagField("$.authors", as_name="authors"),
-        TagField("$.published", as_name="published"),
+        TextField(f"{path}element_id", as_name="element_id"),
+        TagField(f"{path}doc_id", as_name="doc_id"),
+        TagField(f"{path}id", as_name="id"),
+        TextField(f"{path}text", as_name="text"),
+        TextField(f"{path}title", as_name="title"),
+        TagField(f"{path}authors", as_name="authors"),
+        # As a timestamp, published supports range filters ("last 30 days")
+        NumericField(f"{path}published_ts", as_name="published") if published_numeric else TagField(f"{path}published", as_name="published"),
         VectorField(
-            "$.vector",
-            "FLAT",
-            {
-                "TYPE": "FLOAT32",
-                "DIM": VECTOR_DIMENSION,
-                "DISTANCE_METRIC": "COSINE",
-            },
+            f"{path}vector",
+            algorithm,
+            vector_attributes,
             as_name="vector",
         )
     )
     try:
-        definition = IndexDefinition(prefix=["vecdoc:"], index_type=IndexType.JSON)
-        result = client.ft("idx:lmdoc").create_index(fields=schema, definition=definition)
+        definition = IndexDefinition(prefix=[prefix], index_type=index_type)
+        result = client.ft(index_name).create_index(fields=schema, definition=definition)
+        settings = {
+            "vector_type": vector_type,
+            "algorithm": algorithm,
+            "storage": storage,
+            "dim": VECTOR_DIMENSION,
+            "published_numeric": int(published_numeric),
+            "generation": uuid.uuid4().hex,
+        }
+        # Replaced as a whole, so no field of an earlier index with the same name is left behind
+        pipeline = client.pipeline()
+        pipeline.delete(settings_key(index_name))
+        pipeline.hset(settings_key(index_name), mapping=settings)
+        pipeline.execute()
+        cache_index_settings(index_name, settings)
     except Exception as ex:
         result = f"FAILED to create index: {ex}"
     return result
 
   
 def get_index_status(client):
-  info = client.ft("idx:vecdoc").info()
+  info = client.ft(INDEX_NAME).info()
   return info
 
 
@@ -64,85 +228,337 @@ def execute_query(client, query):
     return all_items
 
 
-def write_vector(client, document):
+def hash_mapping(document, vector_type="FLOAT32"):
+    # HASH fields are flat strings: the vector goes in as packed bytes of the index vector type,
+    # tag lists are comma-joined and nested values are serialized to JSON
+    mapping = {}
+    for field, value in document.items():
+        if field == 'redis_key' or value is None:
+            continue
+        if field == 'vector':
+            mapping[field] = encode_vector(value, vector_type)
+        elif isinstance(value, (list, tuple)) and all(isinstance(v, str) for v in value):
+            mapping[field] = ",".join(value)
+        elif isinstance(value, (dict, list, tuple, bool)):
+            mapping[field] = json.dumps(value)
+        else:
+            mapping[field] = value
+    return mapping
+
+
+def published_timestamp(value):
+    # Accepts epoch seconds or an ISO 8601 date/datetime (UTC unless it has an offset)
+    if isinstance(value, (int, float)):
+        return float(value)
+    try:
+        published = datetime.fromisoformat(str(value))
+    except ValueError:
+        return None
+    if published.tzinfo is None:
+        published = published.replace(tzinfo=timezone.utc)
+    return published.timestamp()
+
+
+def queue_write(pipeline, document, storage="json", vector_type="FLOAT32"):
+    redis_key = document['redis_key']
+    if document.get('published') and 'published_ts' not in document:
+        published_ts = published_timestamp(document['published'])
+        if published_ts is not None:
+            document = {**document, 'published_ts': published_ts}
+    if storage == "hash":
+        pipeline.hset(redis_key, mapping=hash_mapping(document, vector_type))
+    else:
+        pipeline.json().set(redis_key, "$", document)
+
+
+def write_vector(client, document, storage=None, index_name=INDEX_NAME):
     result = "FAILED"
     try:
+        settings = get_index_settings(client, index_name, max_age=0)
+        vector_type = settings["vector_type"]
+        storage = storage or settings["storage"]
         pipeline = client.pipeline()
         redis_key = document['redis_key']
-        pipeline.json().set(redis_key, "$", document)
+        queue_write(pipeline, document, storage, vector_type)
+        pipeline.incr(version_key(index_name))
         res = pipeline.execute()
         result = f"{redis_key} record inserted successfully"
     except Exception as e:
         result = f"FAILED with error: {e}"
     return result
-  
 
-def vector_query(client, query_vector):
-    response = "FAILED TO RUN QUERY"
 
+def write_vectors(client, documents, batch_size=500, storage=None, index_name=INDEX_NAME):
+    # One non-transactional pipeline per batch: a single round trip per batch,
+    # and one failing document doesn't abort the others.
+    # Like the vector type, the storage defaults to the one the index was created with.
+    settings = get_index_settings(client, index_name, max_age=0)
+    vector_type = settings["vector_type"]
+    storage = storage or settings["storage"]
+    results = []
+    for start in range(0, len(documents), batch_size):
+        batch = documents[start:start + batch_size]
+        try:
+            pipeline = client.pipeline(transaction=False)
+            for document in batch:
+                queue_write(pipeline, document, storage, vector_type)
+            pipeline.incr(version_key(index_name))
+            responses = pipeline.execute(raise_on_error=False)
+        except Exception as e:
+            responses = [e] * len(batch)
+        for document, response in zip(batch, responses):
+            redis_key = document['redis_key']
+            if isinstance(response, Exception):
+                results.append(f"FAILED with error: {response}")
+            else:
+                results.append(f"{redis_key} record inserted successfully")
+    return results
+
+
+def knn_query(filter_expression="*", k=3, ef_runtime=None, with_vectors=False):
+    # EF_RUNTIME is only accepted by HNSW indexes, so leave it out unless asked for.
+    # FT.SEARCH returns 10 results unless told otherwise, whatever the KNN k.
+    ef_clause = " EF_RUNTIME $ef_runtime" if ef_runtime is not None else ""
     query = (
-        Query('(*)=>[KNN 3 @embeddings $query_vector AS vector_score]')
+        Query(f'({filter_expression})=>[KNN {k} @vector $query_vector{ef_clause} AS vector_score]')
         .sort_by('vector_score')
+        .paging(0, k)
         .return_fields('vector_score', 'title', 'text', 'metadata.orig_elements')
         .dialect(2)
     )
-    query_input = json.loads(query_vector)
-    query_response = client.ft("idx:vecdoc").search(query, { 'query_vector': np.array(query_input, dtype=np.float32).tobytes() }).docs
+    if with_vectors:
+        query.return_field('$.vector', as_field='vector')
+    return query
+
+
+def knn_params(query_vector, vector_type="FLOAT32", ef_runtime=None, **params):
+    params['query_vector'] = query_vector_bytes(query_vector, vector_type)
+    if ef_runtime is not None:
+        params['ef_runtime'] = ef_runtime
+    return params
+
+
+def query_vector_array(query_vector, vector_type="FLOAT32"):
+    if isinstance(query_vector, (bytes, bytearray, memoryview)):
+        return decode_vector(bytes(query_vector), vector_type)
+    if isinstance(query_vector, str):
+        query_vector = json.loads(query_vector)
+    return np.asarray(query_vector, dtype=np.float32)
+
+
+def candidate_vectors(client, docs, settings):
+    if settings["storage"] == "json":
+        vectors = [np.asarray(json.loads(doc.vector), dtype=np.float32) for doc in docs]
+        return [vector[0] if vector.ndim == 2 else vector for vector in vectors]
+    # Search results decode every field as text, so binary HASH vectors are read separately
+    pipeline = client.pipeline(transaction=False)
+    for doc in docs:
+        pipeline.execute_command("HGET", doc.id, "vector", **{NEVER_DECODE: []})
+    return [decode_vector(value, settings["vector_type"]) for value in pipeline.execute()]
+
+
+def rerank_docs(client, docs, query_vector, k, method, settings, lambda_mult=0.5):
+    if len(docs) <= 1:
+        return docs[:k]
+    vectors = np.vstack(candidate_vectors(client, docs, settings))
+    selected = reranking.rerank(query_vector_array(query_vector, settings["vector_type"]), vectors, k, method, lambda_mult)
+    return [docs[position] for position in selected]
+
+
+def knn_search(client, query_vector, filter_expression="*", k=3, ef_runtime=None, index_name=INDEX_NAME,
+               rerank=None, fetch_multiplier=4, lambda_mult=0.5, filters=None, **params):
+    # With rerank ("mmr" or "dedup"), fetches k * fetch_multiplier candidates with their
+    # vectors and keeps a diverse top k. filters is a utils.filters.FilterBuilder, AND-ed
+    # with filter_expression.
+    if filters is not None:
+        filters_expression, filters_params = filters.build()
+        if filters_expression != "*":
+            filter_expression = filters_expression if filter_expression == "*" else f"{filter_expression} {filters_expression}"
+        params.update(filters_params)
+    settings = get_index_settings(client, index_name)
+    fetch_k = k * fetch_multiplier if rerank else k
+    query = knn_query(filter_expression, fetch_k, ef_runtime, with_vectors=bool(rerank) and settings["storage"] == "json")
+    query_params = knn_params(query_vector, settings["vector_type"], ef_runtime, **params)
+    query_response = client.ft(index_name).search(query, query_params).docs
     response = []
     for doc in query_response:
         #json_doc = doc.id
         #response.append(json_doc)
         response.append(doc)
+    if rerank:
+        response = rerank_docs(client, response, query_vector, k, rerank, settings, lambda_mult)
     return response
 
 
-def hybrid_query(client, query_vector, author):
-    response = "FAILED TO RUN QUERY"
+def vector_query(client, query_vector, k=3, ef_runtime=None, index_name=INDEX_NAME, cache=None,
+                 rerank=None, fetch_multiplier=4, lambda_mult=0.5, filters=None):
+    def search():
+        return knn_search(client, query_vector, "*", k, ef_runtime, index_name, rerank, fetch_multiplier, lambda_mult, filters)
+
+    if cache is None:
+        return search()
+    return cache.get_or_search(client, index_name, query_vector, search, k=k, ef_runtime=ef_runtime,
+                               rerank=rerank, fetch_multiplier=fetch_multiplier, lambda_mult=lambda_mult,
+                               filters=filters.build() if filters else None)
+
+
+def hybrid_query(client, query_vector, author, k=3, ef_runtime=None, index_name=INDEX_NAME, cache=None,
+                 rerank=None, fetch_multiplier=4, lambda_mult=0.5, filters=None):
+    def search():
+        return knn_search(client, query_vector, "@authors:{$author}", k, ef_runtime, index_name,
+                          rerank, fetch_multiplier, lambda_mult, filters, author=author)
+
+    if cache is None:
+        return search()
+    return cache.get_or_search(client, index_name, query_vector, search, k=k, ef_runtime=ef_runtime, author=author,
+                               rerank=rerank, fetch_multiplier=fetch_multiplier, lambda_mult=lambda_mult,
+                               filters=filters.build() if filters else None)
+
+
+def search_args(index_name, query, query_params):
+    args = [index_name, *query.get_args()]
+    if query_params:
+        args += ["PARAMS", len(query_params) * 2]
+        for name, value in query_params.items():
+            args += [name, value]
+    return args
+
+
+def pipelined_searches(client, index_name, searches, batch_size=100):
+    # Runs one FT.SEARCH per (query, params) pair, batch_size commands per round trip,
+    # and returns the docs of each search in input order
+    responses = []
+    for start in range(0, len(searches), batch_size):
+        pipeline = client.pipeline(transaction=False)
+        for query, query_params in searches[start:start + batch_size]:
+            pipeline.execute_command("FT.SEARCH", *search_args(index_name, query, query_params))
+        responses.extend(pipeline.execute())
+    return [Result(response, True, duration=0, has_payload=False, with_scores=False).docs for response in responses]
+
+
+def pipelined_search(client, index_name, query, params_list, batch_size=100):
+    return pipelined_searches(client, index_name, [(query, query_params) for query_params in params_list], batch_size)
+
+
+def vector_query_batch(client, query_vectors, k=3, ef_runtime=None, index_name=INDEX_NAME, batch_size=100):
+    # query_vectors is an (N, dim) matrix; returns N result lists in the same order
+    vector_type = get_vector_type(client, index_name)
+    query = knn_query("*", k, ef_runtime)
+    params_list = []
+    for query_vector in np.asarray(query_vectors):
+        params_list.append(knn_params(query_vector, vector_type, ef_runtime))
+    return pipelined_search(client, index_name, query, params_list, batch_size)
+
+
+def hybrid_query_batch(client, query_vectors, author, k=3, ef_runtime=None, index_name=INDEX_NAME, batch_size=100):
+    # author is either one value for every query or a list with one value per query
+    vector_type = get_vector_type(client, index_name)
+    query_vectors = np.asarray(query_vectors)
+    authors = [author] * len(query_vectors) if isinstance(author, str) else list(author)
+    query = knn_query("@authors:{$author}", k, ef_runtime)
+    params_list = []
+    for query_vector, query_author in zip(query_vectors, authors):
+        params_list.append(knn_params(query_vector, vector_type, ef_runtime, author=query_author))
+    return pipelined_search(client, index_name, query, params_list, batch_size)
+
+
+# RediSearch's default separators: text is split on them at index time, so a query
+# term has to be split the same way (an escaped "-" would look for one token, "e-1234",
+# that was never indexed)
+TOKEN_SEPARATORS = ",.<>{}[]\"':;!@#$%^&*()-+=~"
+# Characters that are not separators but still have a meaning in the query syntax
+QUERY_SPECIAL_CHARS = set("|/\\?`")
 
+
+def escape_query_text(text):
+    return "".join(f"\\{c}" if c in QUERY_SPECIAL_CHARS else c for c in text)
+
+
+def query_tokens(text):
+    # Splits text into the tokens RediSearch indexed for it
+    tokens = re.split(f"[{re.escape(TOKEN_SEPARATORS)}\\s]+", text)
+    return [escape_query_text(token) for token in tokens if token]
+
+
+def query_terms(text):
+    # One clause per whitespace-separated word: a plain token, or, for words the
+    # separators split (error codes, versions, dotted names: E-1234, 7.2.4, foo.bar),
+    # an exact phrase of their tokens, which matches them as written
+    terms = []
+    for word in text.split():
+        tokens = query_tokens(word)
+        if len(tokens) == 1:
+            terms.append(tokens[0])
+        elif tokens:
+            terms.append(f'"{" ".join(tokens)}"')
+    return terms
+
+
+def text_query(query_text, k=3, filter_expression="*"):
+    # BM25 full-text query over title and text: any of the words, plus every token of
+    # the split ones, so a partial match on a code or version still scores
+    terms = query_terms(query_text)
+    if not terms:
+        # Falling back to the filter alone would return arbitrary documents as text hits
+        raise ValueError(f"No searchable words in {query_text!r}")
+    terms = terms + [token for term in terms if term.startswith('"') for token in term.strip('"').split()]
+    terms = " | ".join(dict.fromkeys(terms))
+    prefix = f"({filter_expression}) " if filter_expression != "*" else ""
     query = (
-        Query('(@authors:{$author})=>[KNN 3 @embeddings $query_vector AS vector_score]')
-        .sort_by('vector_score')
-        .return_fields('vector_score', 'title', 'text', 'metadata.orig_elements')
+        Query(f'{prefix}@text|title:({terms})')
+        .scorer('BM25')
+        .paging(0, k)
+        .return_fields('title', 'text', 'metadata.orig_elements')
         .dialect(2)
     )
-    query_input = json.loads(query_vector)
-    query_response = client.ft("idx:vecdoc").search(query, {'author': author,'query_vector': np.array(query_input, dtype=np.float32).tobytes() }).docs
-    response = []
-    for doc in query_response:
-        #json_doc = doc.id
-        #response.append(json_doc)
-        response.append(doc)
-    return response
+    return query
+
+
+def rrf_fuse(result_lists, weights, rrf_k=60):
+    # Reciprocal rank fusion: score(doc) = sum of weight / (rrf_k + rank) over the lists it is in
+    scores, docs = {}, {}
+    for results, weight in zip(result_lists, weights):
+        for rank, doc in enumerate(results, start=1):
+            scores[doc.id] = scores.get(doc.id, 0) + weight / (rrf_k + rank)
+            docs.setdefault(doc.id, doc)
+    fused = []
+    for doc_id in sorted(scores, key=scores.get, reverse=True):
+        doc = docs[doc_id]
+        doc.rrf_score = scores[doc_id]
+        fused.append(doc)
+    return fused
 
 
-def embed(client, documents):
+def hybrid_rrf_query(client, query_text, query_vector, k=3, text_weight=1.0, vector_weight=1.0, rrf_k=60,
+                     fetch_k=None, ef_runtime=None, filter_expression="*", index_name=INDEX_NAME, **params):
+    # Runs the full-text and the KNN query in one pipeline and fuses both rankings.
+    # Text without any indexed word (e.g. "--") only runs the KNN query.
+    fetch_k = fetch_k or k * 4
+    vector_params = knn_params(query_vector, get_vector_type(client, index_name), ef_runtime, **params)
+    searches = [(knn_query(filter_expression, fetch_k, ef_runtime), vector_params)]
+    if query_terms(query_text):
+        searches.append((text_query(query_text, fetch_k, filter_expression), dict(params)))
+    results = pipelined_searches(client, index_name, searches)
+    return rrf_fuse(results, [vector_weight, text_weight], rrf_k)[:k]
+
+
+def embed(client, documents, batch_size=500, storage=None, vector_type="FLOAT32", index_name=INDEX_NAME):
   insert_results = []
   #client = initialize_db(client)
 
   try:
-    create_index(client, 1024)
+    create_index(client, 1024, index_name=index_name, storage=storage or "json", vector_type=vector_type)
   except Exception as e:
     print(f"Failed to create index with exception: {e}")
     insert_results.append(e)
 
-  for i in range(len(documents)):
-      document = documents[i]
-      insert_result = write_vector(client, document)
-      insert_results.append(insert_results)
-      if i % 20 == 0:
-          print(f"--> Inserting document {i} - result: {insert_result}")
-
+  insert_results.extend(insert_records(client, documents, batch_size, storage, index_name))
   return insert_results
 
-def insert_records(client, documents):
-  insert_results = []
+def insert_records(client, documents, batch_size=500, storage=None, index_name=INDEX_NAME):
+  insert_results = write_vectors(client, documents, batch_size, storage, index_name)
 
-  for i in range(len(documents)):
-      document = documents[i]
-      insert_result = write_vector(client, document)
-      insert_results.append(insert_results)
-      if i % 20 == 0:
-          print(f"--> Inserting document {i} - result: {insert_result}")
+  for i in range(0, len(insert_results), 20):
+      print(f"--> Inserting document {i} - result: {insert_results[i]}")
 
   return insert_results
-
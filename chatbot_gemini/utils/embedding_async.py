@@ -0,0 +1,77 @@
+import redis.asyncio as aioredis
+from utils.embedding import (INDEX_NAME, SETTINGS_CHECK_INTERVAL, cache_index_settings, cached_index_settings,
+                             checked_index_settings, settings_key, version_key, knn_query, knn_params, queue_write)
+
+# One connection pool for the whole process. Callers that exceed max_connections wait
+# for a free connection instead of opening a new socket.
+_pool = None
+
+
+def configure_pool(redis_url="redis://localhost:6379", max_connections=20, timeout=10, **kwargs):
+    global _pool
+    _pool = aioredis.BlockingConnectionPool.from_url(
+        redis_url, max_connections=max_connections, timeout=timeout, decode_responses=True, **kwargs
+    )
+    return _pool
+
+
+def get_client():
+    if _pool is None:
+        raise RuntimeError("Connection pool not configured. Call configure_pool() first.")
+    return aioredis.Redis(connection_pool=_pool)
+
+
+async def close_pool():
+    global _pool
+    if _pool is not None:
+        await _pool.disconnect()
+        _pool = None
+
+
+async def get_index_settings(client, index_name=INDEX_NAME, max_age=SETTINGS_CHECK_INTERVAL):
+    # Shares the per-process cache with the synchronous functions in utils/embedding.py
+    settings = cached_index_settings(index_name, max_age)
+    if settings is None:
+        settings = checked_index_settings(index_name, await client.hget(settings_key(index_name), "generation"))
+    if settings is None:
+        settings = cache_index_settings(index_name, await client.hgetall(settings_key(index_name)))
+    return settings
+
+
+async def get_vector_type(client, index_name=INDEX_NAME):
+    return (await get_index_settings(client, index_name))["vector_type"]
+
+
+async def json_search_by_key(client, key):
+    return await client.json().get(key)
+
+
+async def write_vector(client, document, storage=None, index_name=INDEX_NAME):
+    result = "FAILED"
+    try:
+        settings = await get_index_settings(client, index_name, max_age=0)
+        vector_type = settings["vector_type"]
+        storage = storage or settings["storage"]
+        pipeline = client.pipeline()
+        redis_key = document['redis_key']
+        queue_write(pipeline, document, storage, vector_type)
+        pipeline.incr(version_key(index_name))
+        res = await pipeline.execute()
+        result = f"{redis_key} record inserted successfully"
+    except Exception as e:
+        result = f"FAILED with error: {e}"
+    return result
+
+
+async def vector_query(client, query_vector, k=3, ef_runtime=None, index_name=INDEX_NAME):
+    query = knn_query("*", k, ef_runtime)
+    query_params = knn_params(query_vector, await get_vector_type(client, index_name), ef_runtime)
+    query_response = await client.ft(index_name).search(query, query_params)
+    return list(query_response.docs)
+
+
+async def hybrid_query(client, query_vector, author, k=3, ef_runtime=None, index_name=INDEX_NAME):
+    query = knn_query("@authors:{$author}", k, ef_runtime)
+    query_params = knn_params(query_vector, await get_vector_type(client, index_name), ef_runtime, author=author)
+    query_response = await client.ft(index_name).search(query, query_params)
+    return list(query_response.docs)
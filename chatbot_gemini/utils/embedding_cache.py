@@ -0,0 +1,94 @@
+import hashlib
+import threading
+import numpy as np
+from collections import OrderedDict
+from langchain_core.embeddings import Embeddings
+
+
+class CachedEmbeddings(Embeddings):
+    """Embeddings wrapper with an in-process LRU tier and a shared Redis tier.
+
+    Vectors are keyed by model name + sha256 of the text and stored in Redis as
+    packed float32 bytes, so the Redis client must use decode_responses=False.
+    """
+
+    def __init__(self, embeddings, client=None, max_size=10000, ttl=None, key_prefix="embcache:"):
+        self.embeddings = embeddings
+        self.client = client
+        self.max_size = max_size
+        self.ttl = ttl
+        self.key_prefix = key_prefix
+        self.model_name = getattr(embeddings, "model_name", type(embeddings).__name__)
+        self.stats = {"lru_hits": 0, "redis_hits": 0, "misses": 0}
+        self._lru = OrderedDict()
+        self._lock = threading.Lock()
+
+    def cache_key(self, text):
+        text_hash = hashlib.sha256(text.encode("utf-8")).hexdigest()
+        return f"{self.key_prefix}{self.model_name}:{text_hash}"
+
+    def hit_rate(self):
+        total = sum(self.stats.values())
+        return (self.stats["lru_hits"] + self.stats["redis_hits"]) / total if total else 0.0
+
+    def _lru_get(self, key):
+        with self._lock:
+            vector = self._lru.get(key)
+            if vector is not None:
+                self._lru.move_to_end(key)
+            return vector
+
+    def _lru_put(self, key, vector):
+        with self._lock:
+            self._lru[key] = vector
+            self._lru.move_to_end(key)
+            while len(self._lru) > self.max_size:
+                self._lru.popitem(last=False)
+
+    def _count(self, stat, amount):
+        with self._lock:
+            self.stats[stat] += amount
+
+    def embed_documents(self, texts):
+        results = [None] * len(texts)
+        missing = OrderedDict()
+        for position, text in enumerate(texts):
+            key = self.cache_key(text)
+            vector = self._lru_get(key)
+            if vector is not None:
+                results[position] = vector
+                self._count("lru_hits", 1)
+            else:
+                missing.setdefault(key, []).append(position)
+
+        if missing and self.client is not None:
+            for key, value in zip(list(missing), self.client.mget(list(missing))):
+                if value is None:
+                    continue
+                vector = np.frombuffer(value, dtype=np.float32).tolist()
+                self._lru_put(key, vector)
+                for position in missing.pop(key):
+                    results[position] = vector
+                    self._count("redis_hits", 1)
+
+        if missing:
+            keys = list(missing)
+            vectors = self.embeddings.embed_documents([texts[missing[key][0]] for key in keys])
+            pipeline = self.client.pipeline(transaction=False) if self.client is not None else None
+            for key, vector in zip(keys, vectors):
+                vector = list(vector)
+                self._lru_put(key, vector)
+                if pipeline is not None:
+                    pipeline.set(key, np.asarray(vector, dtype=np.float32).tobytes(), ex=self.ttl)
+                for position in missing[key]:
+                    results[position] = vector
+                    self._count("misses", 1)
+            if pipeline is not None:
+                pipeline.execute()
+
+        return results
+
+    def embed_query(self, text):
+        # HuggingFaceEmbeddings embeds queries and documents the same way, so questions,
+        # chunks and semantic cache prompts all share one cache entry per text
+        return self.embed_documents([text])[0]
@@ -0,0 +1,67 @@
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+from langchain_core.embeddings import Embeddings
+
+# Model instance owned by each pool worker, loaded once by _init_worker
+_worker_embeddings = None
+
+# HuggingFaceEmbeddings settings copied to the workers, so they embed exactly like the parent
+MODEL_FIELDS = ("model_name", "cache_folder", "model_kwargs", "encode_kwargs", "show_progress")
+
+
+def _init_worker(model_kwargs, threads_per_process):
+    global _worker_embeddings
+    import torch
+    from langchain_huggingface import HuggingFaceEmbeddings
+    # Keep workers from oversubscribing the cores with their own intra-op threads
+    torch.set_num_threads(threads_per_process)
+    _worker_embeddings = HuggingFaceEmbeddings(**model_kwargs)
+
+
+def _embed_batch(texts):
+    return _worker_embeddings.embed_documents(texts)
+
+
+class EmbeddingExecutor(Embeddings):
+    """Splits embedding work into fixed-size batches, optionally across a process pool.
+
+    With processes <= 1 the batches run in-process on the wrapped model. Otherwise each
+    worker loads its own copy of the model and batches are spread over the workers;
+    results always come back in input order.
+    """
+
+    def __init__(self, embeddings, batch_size=32, processes=0, threads_per_process=1):
+        self.embeddings = embeddings
+        self.batch_size = batch_size
+        self.processes = processes
+        self.threads_per_process = threads_per_process
+        self.model_name = getattr(embeddings, "model_name", type(embeddings).__name__)
+        self.model_kwargs = {field: getattr(embeddings, field) for field in MODEL_FIELDS if hasattr(embeddings, field)}
+        self._pool = None
+
+    def _get_pool(self):
+        if self._pool is None:
+            # torch doesn't survive fork() reliably, so workers are spawned
+            self._pool = ProcessPoolExecutor(
+                max_workers=self.processes,
+                mp_context=multiprocessing.get_context("spawn"),
+                initializer=_init_worker,
+                initargs=(self.model_kwargs, self.threads_per_process)
+            )
+        return self._pool
+
+    def embed_documents(self, texts):
+        batches = [texts[i:i + self.batch_size] for i in range(0, len(texts), self.batch_size)]
+        if self.processes > 1 and len(batches) > 1:
+            results = self._get_pool().map(_embed_batch, batches)
+        else:
+            results = (self.embeddings.embed_documents(batch) for batch in batches)
+        return [vector for batch in results for vector in batch]
+
+    def embed_query(self, text):
+        return self.embeddings.embed_query(text)
+
+    def shutdown(self):
+        if self._pool is not None:
+            self._pool.shutdown()
+            self._pool = None
@@ -0,0 +1,103 @@
+import time
+import httpx
+import asyncio
+import xml.etree.ElementTree as ET
+from urllib.parse import urlparse
+from utils.parsing import parse_html
+from utils.chunking import chunk_docs_unstruct
+from unstructured.staging.base import dict_to_elements
+
+SITEMAP_NS = "{http://www.sitemaps.org/schemas/sitemap/0.9}"
+
+
+def sitemap_urls(sitemap_url, timeout=30, max_depth=5, visited=None):
+    # Follows nested sitemap indexes and returns the page URLs in document order.
+    # Each sitemap is read once and nesting stops at max_depth, so cycles can't recurse forever.
+    visited = set() if visited is None else visited
+    if sitemap_url in visited:
+        return []
+    visited.add(sitemap_url)
+    response = httpx.get(sitemap_url, timeout=timeout, follow_redirects=True)
+    response.raise_for_status()
+    root = ET.fromstring(response.content)
+    locations = [loc.text.strip() for loc in root.iter(f"{SITEMAP_NS}loc") if loc.text]
+    if root.tag == f"{SITEMAP_NS}sitemapindex":
+        if max_depth <= 0:
+            print(f"--> Skipping nested sitemaps of {sitemap_url}: too deep")
+            return []
+        urls = []
+        for location in locations:
+            urls.extend(sitemap_urls(location, timeout, max_depth - 1, visited))
+        return urls
+    return locations
+
+
+async def fetch_page(client, url, limit, host_limits, per_host, host_delay):
+    host = urlparse(url).netloc
+    if host not in host_limits:
+        host_limits[host] = asyncio.Semaphore(per_host)
+    result = {"url": url, "status": None, "html": None, "error": None, "fetch_time": 0}
+    # The host slot is taken first, so requests queued behind a busy host don't hold
+    # global slots that other hosts could use
+    async with host_limits[host]:
+        async with limit:
+            timer_start = time.perf_counter()
+            try:
+                response = await client.get(url)
+                result["status"] = response.status_code
+                response.raise_for_status()
+                result["html"] = response.text
+            except Exception as e:
+                result["error"] = f"{type(e).__name__}: {e}"
+            result["fetch_time"] = round(time.perf_counter() - timer_start, 4)
+        # Politeness: keep the host slot (but not the global one) for a while before
+        # the next request to that host
+        if host_delay:
+            await asyncio.sleep(host_delay)
+    return result
+
+
+def chunk_page(result):
+    timer_start = time.perf_counter()
+    try:
+        elements = parse_html(result["html"], result["url"])
+        result["chunks"] = chunk_docs_unstruct(dict_to_elements(elements)) if elements else []
+    except Exception as e:
+        result["error"] = f"{type(e).__name__}: {e}"
+    result["html"] = None
+    result["parse_time"] = round(time.perf_counter() - timer_start, 4)
+    return result
+
+
+async def fetch_and_chunk_async(urls, max_concurrency=10, per_host=2, host_delay=0.0, timeout=30):
+    urls = list(dict.fromkeys(urls))
+    limit = asyncio.Semaphore(max_concurrency)
+    host_limits = {}
+    results = {}
+    async with httpx.AsyncClient(timeout=timeout, follow_redirects=True) as client:
+        tasks = [asyncio.create_task(fetch_page(client, url, limit, host_limits, per_host, host_delay)) for url in urls]
+        parsing = []
+        for task in asyncio.as_completed(tasks):
+            result = await task
+            result["chunks"], result["parse_time"] = [], 0
+            if result["error"] is None:
+                # Parsing is CPU bound: run it off the event loop while the other fetches continue
+                parsing.append(asyncio.create_task(asyncio.to_thread(chunk_page, result)))
+            results[result["url"]] = result
+        await asyncio.gather(*parsing)
+    return [results[url] for url in urls]
+
+
+def fetch_and_chunk(urls=None, sitemap=None, max_concurrency=10, per_host=2, host_delay=0.0, timeout=30):
+    # Batch entry point: fetches a list of URLs (or all the pages of a sitemap) concurrently
+    # and returns one report per URL with timings, chunks and the error, if any
+    urls = list(urls or [])
+    if sitemap:
+        urls.extend(sitemap_urls(sitemap, timeout))
+    timer_start = time.perf_counter()
+    results = asyncio.run(fetch_and_chunk_async(urls, max_concurrency, per_host, host_delay, timeout))
+    failed = [result for result in results if result["error"]]
+    print(f"--> Fetched {len(results)} pages in {time.perf_counter() - timer_start:.2f}s, {len(failed)} failed")
+    for result in failed:
+        print(f"--> FAILED {result['url']}: {result['error']}")
+    return results
@@ -0,0 +1,49 @@
+import time
+from utils.embedding import query_terms
+
+
+class FilterBuilder:
+    """Composes tag, numeric range and text predicates into a KNN pre-filter.
+
+    Predicates are AND-ed; build() returns the filter expression and its query params,
+    ready to be passed as `filters=` to vector_query / hybrid_query.
+    """
+
+    def __init__(self):
+        self.clauses = []
+        self.params = {}
+        # The same predicates as (kind, field, value), for backends without a query language
+        self.predicates = []
+
+    def _param(self, value):
+        name = f"filter_{len(self.params)}"
+        self.params[name] = value
+        return f"${name}"
+
+    def tag(self, field, values):
+        # Matches any of the values
+        values = [values] if isinstance(values, str) else list(values)
+        self.predicates.append(("tag", field, values))
+        self.clauses.append(f"@{field}:{{{' | '.join(self._param(value) for value in values)}}}")
+        return self
+
+    def range(self, field, minimum=None, maximum=None):
+        self.predicates.append(("range", field, (minimum, maximum)))
+        lower = self._param(minimum) if minimum is not None else "-inf"
+        upper = self._param(maximum) if maximum is not None else "+inf"
+        self.clauses.append(f"@{field}:[{lower} {upper}]")
+        return self
+
+    def since(self, field, days, now=None):
+        # For timestamp fields, e.g. since("published", 30) for the last 30 days
+        now = now if now is not None else time.time()
+        return self.range(field, now - days * 86400, None)
+
+    def text(self, field, terms):
+        # All of the words; words with separators (E-1234, 7.2.4) as exact phrases
+        self.predicates.append(("text", field, terms))
+        self.clauses.append(f"@{field}:({' '.join(query_terms(terms))})")
+        return self
+
+    def build(self):
+        return " ".join(self.clauses) or "*", dict(self.params)
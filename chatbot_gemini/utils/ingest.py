@@ -0,0 +1,151 @@
+import hashlib
+from utils.parsing import parse_iter
+from utils.chunking import chunk_iter
+from utils.pipeline import batched, chunk_hash, run_stages
+from utils.embedding import version_key
+
+# Manifest keys live under "idx:" so vector_db_cleanup() resets them together with the chunks
+MANIFEST_PREFIX = "idx:manifest:"
+
+
+def manifest_key(url):
+    return f"{MANIFEST_PREFIX}{hashlib.sha256(url.encode('utf-8')).hexdigest()}"
+
+
+def stored_hashes(client, url):
+    return set(client.smembers(manifest_key(url)))
+
+
+def new_chunks(url, texts, metadata, stored):
+    # Drops the chunks that are already stored (or repeated in this batch)
+    hashes, new_texts, new_metadata = [], [], []
+    for text, metadata_obj in zip(texts, metadata):
+        hash_value = chunk_hash(url, text)
+        if hash_value not in stored and hash_value not in hashes:
+            hashes.append(hash_value)
+            new_texts.append(text)
+            new_metadata.append(metadata_obj)
+    return hashes, new_texts, new_metadata
+
+
+def add_chunks(client, vector_store, url, hashes, texts, metadata, index_name="idx:web"):
+    if hashes:
+        vector_store.add_texts(texts, metadata, keys=hashes)
+        pipeline = client.pipeline(transaction=False)
+        pipeline.sadd(manifest_key(url), *hashes)
+        pipeline.incr(version_key(index_name))
+        pipeline.execute()
+
+
+def update_positions(client, positions, index_name="idx:web"):
+    # Chunks that are already stored aren't written again, but their position on the page
+    # may have moved, and utils/context.py uses it to merge neighbouring chunks
+    if positions:
+        pipeline = client.pipeline(transaction=False)
+        for hash_value, position in positions.items():
+            pipeline.hset(f"{index_name}:{hash_value}", "chunk_index", position)
+        pipeline.execute()
+
+
+def remove_chunks(client, url, hashes, index_name="idx:web"):
+    if hashes:
+        pipeline = client.pipeline(transaction=False)
+        pipeline.delete(*[f"{index_name}:{hash_value}" for hash_value in hashes])
+        pipeline.srem(manifest_key(url), *hashes)
+        pipeline.incr(version_key(index_name))
+        pipeline.execute()
+
+
+def sync_chunks(client, vector_store, url, texts, metadata, index_name="idx:web"):
+    # Each chunk is stored under a key derived from its content hash, and the manifest
+    # keeps the set of hashes currently stored for the URL. Only chunks that are not in
+    # the manifest get embedded; chunks that are no longer on the page get deleted.
+    stored = stored_hashes(client, url)
+    hashes, new_texts, new_metadata = new_chunks(url, texts, metadata, stored)
+    add_chunks(client, vector_store, url, hashes, new_texts, new_metadata, index_name)
+    positions = {}
+    for text, metadata_obj in zip(texts, metadata):
+        hash_value = chunk_hash(url, text)
+        if hash_value in stored:
+            positions.setdefault(hash_value, metadata_obj["chunk_index"])
+    update_positions(client, positions, index_name)
+    removed = stored - {chunk_hash(url, text) for text in texts}
+    remove_chunks(client, url, removed, index_name)
+
+    result = {
+        "added": len(hashes),
+        "skipped": len(texts) - len(hashes),
+        "removed": len(removed),
+    }
+    print(f"--> Synced {url}: {result}")
+    return result
+
+
+def chunk_metadata(document, counter):
+    return {
+        "id": f"webdoc:{counter:05}",
+        # Position on the page, numeric so it survives as a field in search results
+        # (redis-py replaces "id" with the document key)
+        "chunk_index": counter,
+        "url": document["metadata"]["url"],
+        "filetype": document["metadata"]["filetype"],
+        "languages": document["metadata"]["languages"],
+    }
+
+
+def ingest_page(client, vector_store, embeddings, url, batch_size=32, queue_size=4, index_name="idx:web", progress=None):
+    # Streaming version of parse + chunk + sync_chunks: fetching, chunking, embedding and
+    # Redis writes overlap, and only a few batches are held in memory at any time.
+    # The embed stage fills the embeddings cache, so add_texts doesn't run the model again.
+    # progress, if given, is called with the running counts after every batch is written.
+    stored = stored_hashes(client, url)
+    seen = set()
+    counter = 0
+
+    def filter_stage(chunk_batches):
+        nonlocal counter
+        known = set(stored)
+        for batch in chunk_batches:
+            texts, metadata, positions = [], [], {}
+            for document in batch:
+                counter = counter + 1
+                hash_value = chunk_hash(url, document["text"])
+                texts.append(document["text"])
+                metadata.append(chunk_metadata(document, counter))
+                if hash_value in stored and hash_value not in seen:
+                    positions[hash_value] = counter
+                seen.add(hash_value)
+            hashes, new_texts, new_metadata = new_chunks(url, texts, metadata, known)
+            known.update(hashes)
+            yield hashes, new_texts, new_metadata, positions
+
+    def embed_stage(batches):
+        for hashes, texts, metadata, positions in batches:
+            if texts:
+                embeddings.embed_documents(texts)
+            yield hashes, texts, metadata, positions
+
+    stages = [
+        chunk_iter,
+        lambda chunks: batched(chunks, batch_size),
+        filter_stage,
+        embed_stage,
+    ]
+    added = 0
+    for hashes, texts, metadata, positions in run_stages(parse_iter(url), stages, queue_size=queue_size):
+        add_chunks(client, vector_store, url, hashes, texts, metadata, index_name)
+        update_positions(client, positions, index_name)
+        added = added + len(hashes)
+        if progress is not None:
+            progress({"chunks": counter, "added": added})
+
+    removed = stored - seen
+    remove_chunks(client, url, removed, index_name)
+
+    result = {
+        "added": added,
+        "skipped": counter - added,
+        "removed": len(removed),
+    }
+    print(f"--> Ingested {url}: {result}")
+    return result
@@ -0,0 +1,131 @@
+import os
+import time
+import uuid
+import socket
+import threading
+from redis.exceptions import ResponseError
+
+STREAM_KEY = "ingest:jobs"
+GROUP_NAME = "ingest-workers"
+JOB_PREFIX = "ingest:job:"
+
+# XAUTOCLAIM cursor of each consumer, so every call continues the scan of the pending
+# entries where the last one stopped instead of re-reading them from the start
+_claim_cursors = {}
+
+
+def job_key(job_id):
+    return f"{JOB_PREFIX}{job_id}"
+
+
+def consumer_name():
+    return f"{socket.gethostname()}-{os.getpid()}"
+
+
+def ensure_group(client):
+    try:
+        client.xgroup_create(STREAM_KEY, GROUP_NAME, id="0", mkstream=True)
+    except ResponseError as e:
+        if "BUSYGROUP" not in str(e):
+            raise
+
+
+def enqueue(client, url, index_name="idx:web", job_ttl=86400):
+    # The status hash is written before the stream entry (same MULTI), so a worker
+    # never picks up a job that can't be polled
+    job_id = uuid.uuid4().hex
+    pipeline = client.pipeline()
+    pipeline.hset(job_key(job_id), mapping={
+        "url": url,
+        "index_name": index_name,
+        "status": "queued",
+        "attempts": 0,
+        "created": time.time(),
+    })
+    pipeline.expire(job_key(job_id), job_ttl)
+    pipeline.xadd(STREAM_KEY, {"job_id": job_id, "url": url, "index_name": index_name}, maxlen=10000, approximate=True)
+    pipeline.execute()
+    return job_id
+
+
+def get_status(client, job_id):
+    return client.hgetall(job_key(job_id))
+
+
+def update_status(client, job_id, **fields):
+    client.hset(job_key(job_id), mapping={name: value for name, value in fields.items() if value is not None})
+
+
+def claim_jobs(client, consumer, count=1, block_ms=5000, min_idle_ms=60000):
+    # Jobs left pending by a worker that died (or failed) are retried first, once they've
+    # been idle for min_idle_ms; then new jobs are read from the stream
+    stalled = client.xautoclaim(STREAM_KEY, GROUP_NAME, consumer, min_idle_ms,
+                                start_id=_claim_cursors.get(consumer, "0-0"), count=count)
+    # "0-0" once the whole pending list has been scanned: the next call starts over
+    _claim_cursors[consumer] = stalled[0]
+    if stalled[1]:
+        return stalled[1]
+    response = client.xreadgroup(GROUP_NAME, consumer, {STREAM_KEY: ">"}, count=count, block=block_ms)
+    return response[0][1] if response else []
+
+
+def heartbeat(client, consumer, entry_id, interval, stop):
+    # Resets the entry's idle time every interval seconds until stop is set, so a job
+    # that is still running (e.g. parsing a long page) isn't claimed by another worker
+    while not stop.wait(interval):
+        try:
+            client.xclaim(STREAM_KEY, GROUP_NAME, consumer, 0, [entry_id], justid=True)
+        except Exception as e:
+            print(f"--> Heartbeat for {entry_id} failed: {e}")
+
+
+def process_job(client, consumer, entry_id, fields, handler, max_attempts=3, min_idle_ms=60000):
+    job_id = fields["job_id"]
+    attempts = client.hincrby(job_key(job_id), "attempts", 1)
+    if attempts > max_attempts:
+        update_status(client, job_id, status="failed", finished=time.time())
+        client.xack(STREAM_KEY, GROUP_NAME, entry_id)
+        print(f"--> Job {job_id} failed after {max_attempts} attempts")
+        return
+
+    update_status(client, job_id, status="running", worker=consumer, started=time.time())
+
+    def progress(counts):
+        update_status(client, job_id, **counts)
+
+    # Well inside min_idle_ms, so the entry never looks stalled while the handler runs
+    stop = threading.Event()
+    beat = threading.Thread(target=heartbeat, args=(client, consumer, entry_id, min_idle_ms / 3000, stop), daemon=True)
+    beat.start()
+    try:
+        result = handler(fields["url"], fields.get("index_name", "idx:web"), progress)
+    except Exception as e:
+        # Not acknowledged: the entry stays pending and is retried by claim_jobs
+        update_status(client, job_id, status="retrying", error=str(e))
+        print(f"--> Job {job_id} ({fields['url']}) failed: {e}")
+        return
+    finally:
+        stop.set()
+        beat.join()
+    pipeline = client.pipeline()
+    pipeline.hset(job_key(job_id), mapping={**result, "status": "done", "finished": time.time()})
+    pipeline.xack(STREAM_KEY, GROUP_NAME, entry_id)
+    pipeline.execute()
+
+
+def run_worker(client, handler, consumer=None, max_attempts=3, block_ms=5000, min_idle_ms=60000, stop=None):
+    """Consumes ingestion jobs until stop() returns True (forever by default).
+
+    handler(url, index_name, progress) does the work and returns a dict of counts,
+    e.g. the result of ingest_page. The Redis client must use decode_responses=True.
+    """
+    consumer = consumer or consumer_name()
+    ensure_group(client)
+    print(f"--> Worker {consumer} waiting for jobs on {STREAM_KEY}")
+    while stop is None or not stop():
+        for entry_id, fields in claim_jobs(client, consumer, block_ms=block_ms, min_idle_ms=min_idle_ms):
+            if fields:
+                process_job(client, consumer, entry_id, fields, handler, max_attempts, min_idle_ms)
+            else:
+                # Entry trimmed from the stream while pending: nothing left to run
+                client.xack(STREAM_KEY, GROUP_NAME, entry_id)
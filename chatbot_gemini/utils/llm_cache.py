@@ -0,0 +1,82 @@
+import threading
+from collections import OrderedDict
+from langchain_core.caches import BaseCache
+
+
+class LRUCache(BaseCache):
+    """Exact-match LLM cache kept in the process, bounded to max_size entries."""
+
+    def __init__(self, max_size=256):
+        self.max_size = max_size
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def lookup(self, prompt, llm_string):
+        with self._lock:
+            generations = self._entries.get((prompt, llm_string))
+            if generations is not None:
+                self._entries.move_to_end((prompt, llm_string))
+            return generations
+
+    def update(self, prompt, llm_string, return_val):
+        with self._lock:
+            self._entries[(prompt, llm_string)] = return_val
+            self._entries.move_to_end((prompt, llm_string))
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+
+    def clear(self, **kwargs):
+        with self._lock:
+            self._entries.clear()
+
+
+class TieredLLMCache(BaseCache):
+    """LLM cache that checks its tiers in order, cheapest first.
+
+    tiers is a list of (name, cache) pairs. A hit on a lower tier is copied
+    into the tiers above it, so the next identical prompt stops at the
+    cheapest one; new responses are written to every tier.
+    """
+
+    def __init__(self, tiers):
+        self.tiers = list(tiers)
+        self.stats = {name: 0 for name, _ in self.tiers}
+        self.stats["misses"] = 0
+        self._lock = threading.Lock()
+
+    def _count(self, stat):
+        with self._lock:
+            self.stats[stat] += 1
+
+    def hit_rate(self, tier=None):
+        total = sum(self.stats.values())
+        if not total:
+            return 0.0
+        hits = self.stats[tier] if tier else total - self.stats["misses"]
+        return hits / total
+
+    def lookup(self, prompt, llm_string):
+        for position, (name, cache) in enumerate(self.tiers):
+            try:
+                generations = cache.lookup(prompt, llm_string)
+            except Exception as e:
+                print(f"--> LLM cache tier {name} failed: {e}")
+                continue
+            if generations:
+                self._count(name)
+                for _, upper in self.tiers[:position]:
+                    upper.update(prompt, llm_string, generations)
+                return generations
+        self._count("misses")
+        return None
+
+    def update(self, prompt, llm_string, return_val):
+        for name, cache in self.tiers:
+            try:
+                cache.update(prompt, llm_string, return_val)
+            except Exception as e:
+                print(f"--> LLM cache tier {name} failed: {e}")
+
+    def clear(self, **kwargs):
+        for _, cache in self.tiers:
+            cache.clear(**kwargs)
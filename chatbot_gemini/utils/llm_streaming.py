@@ -0,0 +1,85 @@
+import time
+from langchain.globals import get_llm_cache
+from langchain_core.load import dumps
+from langchain_core.messages import AIMessage
+from langchain_core.outputs import ChatGeneration
+
+
+class StreamStats:
+    """Timings of one streamed response: time to first token, total time and tokens/sec."""
+
+    def __init__(self):
+        self.start = time.perf_counter()
+        self.first_token_at = None
+        self.end = None
+        self.tokens = 0
+        self.cached = False
+
+    def token_received(self):
+        if self.first_token_at is None:
+            self.first_token_at = time.perf_counter()
+
+    def finish(self, tokens):
+        self.end = time.perf_counter()
+        self.tokens = tokens
+
+    @property
+    def time_to_first_token(self):
+        return round((self.first_token_at or self.end or self.start) - self.start, 4)
+
+    @property
+    def total_time(self):
+        return round((self.end or time.perf_counter()) - self.start, 4)
+
+    @property
+    def tokens_per_second(self):
+        # Generation rate after the first token, which is what the user watches.
+        # Meaningless for a cache hit (the whole text arrives at once): check cached first.
+        elapsed = (self.end or time.perf_counter()) - (self.first_token_at or self.start)
+        return round(self.tokens / elapsed, 1) if elapsed > 0 else 0.0
+
+
+def stream_text(chunks, stats):
+    # Yields the text of each message chunk as it arrives and fills in stats. Token counts
+    # come from the aggregated usage metadata when the model reports it.
+    message = None
+    for chunk in chunks:
+        message = chunk if message is None else message + chunk
+        if chunk.content:
+            stats.token_received()
+            yield chunk.content
+    usage = getattr(message, "usage_metadata", None) if message is not None else None
+    text = message.content if message is not None else ""
+    stats.finish(usage["output_tokens"] if usage else len(text.split()))
+
+
+def llm_string(llm):
+    # The cache key langchain uses for this model and its parameters in invoke(), so
+    # streamed and invoked responses share cache entries. There's no public accessor:
+    # _get_llm_string is private API, checked against langchain-core==0.3.6 (requirements.txt).
+    return llm._get_llm_string()
+
+
+def stream_response(llm, messages, stats):
+    # chat_model.stream() skips the global LLM cache, so check it the same way invoke()
+    # does: cache hits are returned in one piece, fresh responses are streamed and then
+    # written to the cache
+    llm_cache = get_llm_cache()
+    cache_key = llm_string(llm)
+    prompt = dumps(messages)
+    if llm_cache is not None:
+        cached = llm_cache.lookup(prompt, cache_key)
+        if cached:
+            stats.cached = True
+            stats.token_received()
+            text = cached[0].text
+            stats.finish(len(text.split()))
+            yield text
+            return
+
+    chunks = []
+    for text in stream_text(llm.stream(messages), stats):
+        chunks.append(text)
+        yield text
+    if llm_cache is not None:
+        llm_cache.update(prompt, cache_key, [ChatGeneration(message=AIMessage(content="".join(chunks)))])
@@ -0,0 +1,249 @@
+import json
+import sqlite3
+import threading
+import numpy as np
+from pathlib import Path
+from types import SimpleNamespace
+from redis.commands.search.document import Document
+from utils import reranking
+from utils.embedding import INDEX_NAME, published_timestamp, query_tokens
+
+TAG_FIELDS = ("doc_id", "id", "authors", "published")
+
+
+class LocalVectorIndex:
+    """Exact cosine search over a memory-mapped float32 matrix, for when there's no Redis Stack.
+
+    Vectors are normalized and appended to `<path>/vectors.f32`; everything else about a
+    chunk lives in a SQLite sidecar (`<path>/metadata.db`). Opening an index only maps the
+    file, so it is instant whatever its size; pages are read as searches touch them.
+    """
+
+    def __init__(self, path, dim=None):
+        self.path = Path(path)
+        self.path.mkdir(parents=True, exist_ok=True)
+        self.vectors_path = self.path / "vectors.f32"
+        settings_path = self.path / "index.json"
+        if settings_path.exists():
+            self.dim = json.loads(settings_path.read_text())["dim"]
+        elif dim is None:
+            raise ValueError(f"{self.path} is not an index yet: pass dim to create it")
+        else:
+            self.dim = dim
+            settings_path.write_text(json.dumps({"dim": dim}))
+        self.vectors_path.touch()
+
+        self._lock = threading.Lock()
+        self._matrix = None
+        # Bumped on every write; read by RetrievalCache through get(), like the Redis version key
+        self.version = 0
+        self.db = sqlite3.connect(self.path / "metadata.db", check_same_thread=False)
+        self.db.executescript("""
+            CREATE TABLE IF NOT EXISTS docs (row INTEGER PRIMARY KEY, key TEXT UNIQUE, document TEXT);
+            CREATE TABLE IF NOT EXISTS tags (row INTEGER, field TEXT, value TEXT);
+            CREATE INDEX IF NOT EXISTS tags_lookup ON tags (field, value);
+        """)
+
+    def __len__(self):
+        return self.vectors_path.stat().st_size // (self.dim * 4)
+
+    def matrix(self):
+        count = len(self)
+        if self._matrix is None or self._matrix.shape[0] != count:
+            if count == 0:
+                return np.empty((0, self.dim), dtype=np.float32)
+            self._matrix = np.memmap(self.vectors_path, dtype=np.float32, mode="r", shape=(count, self.dim))
+        return self._matrix
+
+    def get(self, key):
+        return self.version
+
+    def add(self, documents):
+        # Existing keys are overwritten in place; new keys are appended. A key repeated in
+        # the batch is written once, with its last document, as consecutive Redis writes would.
+        latest = {document["redis_key"]: position for position, document in enumerate(documents)}
+        unique = [documents[position] for position in latest.values()]
+        with self._lock:
+            vectors = reranking.normalize([document["vector"] for document in unique])
+            next_row = len(self)
+            appended, updated = [], {}
+            try:
+                for document, vector in zip(unique, vectors):
+                    key = document["redis_key"]
+                    found = self.db.execute("SELECT row FROM docs WHERE key = ?", (key,)).fetchone()
+                    if found:
+                        row = found[0]
+                        updated[row] = vector
+                        self.db.execute("DELETE FROM tags WHERE row = ?", (row,))
+                    else:
+                        row = next_row + len(appended)
+                        appended.append(vector)
+                    fields = {name: value for name, value in document.items() if name not in ("redis_key", "vector")}
+                    self.db.execute("INSERT OR REPLACE INTO docs (row, key, document) VALUES (?, ?, ?)",
+                                    (row, key, json.dumps(fields, default=str)))
+                    self.db.executemany("INSERT INTO tags (row, field, value) VALUES (?, ?, ?)",
+                                        [(row, field, value) for field, value in tag_values(fields)])
+            except Exception:
+                self.db.rollback()
+                raise
+            # Vectors are only written once the metadata is known to be consistent
+            if updated:
+                matrix = np.memmap(self.vectors_path, dtype=np.float32, mode="r+", shape=(next_row, self.dim))
+                for row, vector in updated.items():
+                    matrix[row] = vector
+                matrix.flush()
+            if appended:
+                with open(self.vectors_path, "ab") as f:
+                    f.write(np.vstack(appended).astype(np.float32).tobytes())
+            self.db.commit()
+            self.version = self.version + 1
+        return [f"{document['redis_key']} record inserted successfully" for document in documents]
+
+    def filtered_rows(self, filters):
+        # Rows matching every field -> value tag filter (values can be a list: any of them),
+        # or every predicate of a utils.filters.FilterBuilder
+        if hasattr(filters, "predicates"):
+            return self.predicate_rows(filters.predicates)
+        rows = None
+        for field, values in filters.items():
+            values = [values] if isinstance(values, str) else list(values)
+            placeholders = ",".join("?" * len(values))
+            found = {row for (row,) in self.db.execute(
+                f"SELECT row FROM tags WHERE field = ? AND value IN ({placeholders})", (field, *values))}
+            rows = found if rows is None else rows & found
+        return np.array(sorted(rows), dtype=np.int64)
+
+    def predicate_rows(self, predicates):
+        tags = {}
+        for kind, field, value in predicates:
+            if kind == "tag":
+                tags[field] = sorted(set(tags.get(field, value)) & set(value)) if field in tags else value
+        others = [predicate for predicate in predicates if predicate[0] != "tag"]
+        if tags:
+            rows = self.filtered_rows(tags)
+            documents = [self.db.execute("SELECT row, document FROM docs WHERE row = ?", (int(row),)).fetchone()
+                         for row in rows] if others else []
+        else:
+            rows = np.arange(len(self), dtype=np.int64)
+            documents = self.db.execute("SELECT row, document FROM docs ORDER BY row").fetchall() if others else []
+        if not others:
+            return rows
+        return np.array([row for row, document in documents if matches(json.loads(document), others)], dtype=np.int64)
+
+    def search(self, query_vector, k=3, filters=None, with_vectors=False):
+        matrix = self.matrix()
+        query = reranking.normalize(query_vector)
+        if filters:
+            rows = self.filtered_rows(filters)
+            scores = matrix[rows] @ query if len(rows) else np.empty(0, dtype=np.float32)
+        else:
+            rows = None
+            # One BLAS matrix-vector product over the whole mapped file
+            scores = matrix @ query
+        k = min(k, len(scores))
+        if k == 0:
+            return []
+        top = np.argpartition(-scores, k - 1)[:k]
+        top = top[np.argsort(-scores[top])]
+        result_rows = rows[top] if rows is not None else top
+
+        docs = []
+        for row, score in zip(result_rows, scores[top]):
+            key, document = self.db.execute("SELECT key, document FROM docs WHERE row = ?", (int(row),)).fetchone()
+            fields = json.loads(document)
+            # Same score as a Redis COSINE index: distance, lower is better
+            fields["vector_score"] = str(1 - float(score))
+            if with_vectors:
+                fields["vector"] = matrix[row]
+            # Like a Redis search result, the document id is the key (the chunk "id" field isn't returned)
+            fields.pop("id", None)
+            docs.append(Document(key, **fields))
+        return docs
+
+
+def tag_values(fields):
+    for field in TAG_FIELDS:
+        value = fields.get(field)
+        if value is None:
+            continue
+        values = value if isinstance(value, (list, tuple)) else str(value).split(",")
+        for item in values:
+            yield field, str(item).strip()
+
+
+def matches(fields, predicates):
+    # Range and text predicates of a FilterBuilder, checked against a stored document
+    for kind, field, value in predicates:
+        if kind == "range":
+            # The numeric "published" field is indexed from published_ts (see create_index)
+            number = published_timestamp(fields.get("published")) if field == "published" else fields.get(field)
+            try:
+                number = float(number)
+            except (TypeError, ValueError):
+                return False
+            minimum, maximum = value
+            if (minimum is not None and number < minimum) or (maximum is not None and number > maximum):
+                return False
+        elif kind == "text":
+            tokens = {token.lower() for token in query_tokens(str(fields.get(field, "")))}
+            if not all(token.lower() in tokens for token in query_tokens(value)):
+                return False
+    return True
+
+
+def query_array(query_vector):
+    if isinstance(query_vector, (bytes, bytearray, memoryview)):
+        return np.frombuffer(query_vector, dtype=np.float32)
+    if isinstance(query_vector, str):
+        query_vector = json.loads(query_vector)
+    return np.asarray(query_vector, dtype=np.float32)
+
+
+def local_search(client, query_vector, k, filters, rerank, fetch_multiplier, lambda_mult):
+    query = query_array(query_vector)
+    if not rerank:
+        return client.search(query, k, filters)
+    docs = client.search(query, k * fetch_multiplier, filters, with_vectors=True)
+    if len(docs) <= 1:
+        return docs
+    selected = reranking.rerank(query, np.vstack([doc.vector for doc in docs]), k, rerank, lambda_mult)
+    return [docs[position] for position in selected]
+
+
+# Same signatures as utils/embedding.py, with a LocalVectorIndex in place of the Redis client.
+# ef_runtime and index_name are accepted for compatibility: the search is always exact.
+# filters (a utils.filters.FilterBuilder) are checked against the stored chunk fields.
+
+def write_vectors(client, documents, batch_size=500, storage=None, index_name=INDEX_NAME):
+    results = []
+    for start in range(0, len(documents), batch_size):
+        results.extend(client.add(documents[start:start + batch_size]))
+    return results
+
+
+def vector_query(client, query_vector, k=3, ef_runtime=None, index_name=INDEX_NAME, cache=None,
+                 rerank=None, fetch_multiplier=4, lambda_mult=0.5, filters=None):
+    def search():
+        return local_search(client, query_vector, k, filters, rerank, fetch_multiplier, lambda_mult)
+
+    if cache is None:
+        return search()
+    return cache.get_or_search(client, index_name, query_vector, search, k=k, ef_runtime=ef_runtime,
+                               rerank=rerank, fetch_multiplier=fetch_multiplier, lambda_mult=lambda_mult,
+                               filters=filters.build() if filters else None)
+
+
+def hybrid_query(client, query_vector, author, k=3, ef_runtime=None, index_name=INDEX_NAME, cache=None,
+                 rerank=None, fetch_multiplier=4, lambda_mult=0.5, filters=None):
+    # The author is one more tag predicate, AND-ed with filters
+    predicates = [("tag", "authors", [author])] + (filters.predicates if filters else [])
+
+    def search():
+        return local_search(client, query_vector, k, SimpleNamespace(predicates=predicates),
+                            rerank, fetch_multiplier, lambda_mult)
+
+    if cache is None:
+        return search()
+    return cache.get_or_search(client, index_name, query_vector, search, k=k, ef_runtime=ef_runtime, author=author,
+                               rerank=rerank, fetch_multiplier=fetch_multiplier, lambda_mult=lambda_mult,
+                               filters=filters.build() if filters else None)
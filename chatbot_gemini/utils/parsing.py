@@ -1,16 +1,37 @@
 from unstructured.partition.html import partition_html
-from rag_schema import Document
+from utils.rag_schema import Document
 
-def parse(url):
-    print(f"--> Starting parse: {url}")
-    acceptable_types = ["NarrativeText", "List", "ListItem"]
-    elements = partition_html(url=url)
-    output_list = Document()
+ACCEPTABLE_TYPES = ["NarrativeText", "List", "ListItem"]
+
+
+def filter_elements(elements, url=None):
     for element in elements:
         el = element.to_dict()
         el_type = el["type"]
-        if el_type in acceptable_types:
+        if el_type in ACCEPTABLE_TYPES:
             if len(el["text"]) >= 20:
-                output_list.append(element.to_dict())
+                # partition_html only fills the url when it downloads the page itself
+                if url is not None:
+                    el["metadata"].setdefault("url", url)
+                yield el
+
+
+def parse_iter(url):
+    # partition_html downloads and parses the whole page first; the elements are then yielded
+    # one at a time, so chunking starts before they are all filtered and converted to dicts
+    print(f"--> Starting parse: {url}")
+    elements = partition_html(url=url)
+    yield from filter_elements(elements)
+
+
+def parse_html(html, url):
+    # Same as parse_iter, for pages that were already downloaded (see utils/fetching.py)
+    elements = partition_html(text=html)
+    return list(filter_elements(elements, url))
+
+
+def parse(url):
+    output_list = Document()
+    output_list.extend(parse_iter(url))
     print(f"--> Total Elements: {len(output_list)}")        
     return output_list
@@ -0,0 +1,130 @@
+import queue
+import hashlib
+import threading
+from utils.parsing import parse_iter
+from utils.chunking import chunk_iter
+from utils.embedding import KEY_PREFIX, write_vectors
+
+_DONE = object()
+
+
+class _StageFailure:
+    def __init__(self, error):
+        self.error = error
+
+
+def _put(out_queue, item, stop):
+    while not stop.is_set():
+        try:
+            out_queue.put(item, timeout=0.1)
+            return True
+        except queue.Full:
+            continue
+    return False
+
+
+def _pump(iterator, out_queue, stop):
+    try:
+        for item in iterator:
+            if not _put(out_queue, item, stop):
+                return
+    except BaseException as e:
+        _put(out_queue, _StageFailure(e), stop)
+    finally:
+        _put(out_queue, _DONE, stop)
+
+
+def _drain(in_queue, stop):
+    # Polls, so a stage waiting for input also exits once the pipeline is stopped
+    # (the upstream _pump gives up on delivering _DONE when stop is set)
+    while True:
+        try:
+            item = in_queue.get(timeout=0.1)
+        except queue.Empty:
+            if stop.is_set():
+                return
+            continue
+        if item is _DONE:
+            return
+        if isinstance(item, _StageFailure):
+            raise item.error
+        yield item
+
+
+def chunk_hash(url, text):
+    # Key of a chunk for both ingestion paths (ingest_url here, utils/ingest.ingest_page):
+    # identical text on two pages is two documents
+    return hashlib.sha256(f"{url}\n{text}".encode("utf-8")).hexdigest()
+
+
+def batched(items, size):
+    batch = []
+    for item in items:
+        batch.append(item)
+        if len(batch) >= size:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
+
+
+def run_stages(source, stages, queue_size=4):
+    # Runs the source and every stage (a function from iterator to iterator) in its own
+    # thread, connected by bounded queues: stages overlap, and at most queue_size items
+    # wait between two stages however big the input is. An error in any stage is
+    # re-raised to the consumer, and stopping early shuts the upstream threads down.
+    stop = threading.Event()
+    threads = []
+
+    current = queue.Queue(maxsize=queue_size)
+    threads.append(threading.Thread(target=_pump, args=(iter(source), current, stop), daemon=True))
+    for stage in stages:
+        following = queue.Queue(maxsize=queue_size)
+        threads.append(threading.Thread(target=_pump, args=(stage(_drain(current, stop)), following, stop), daemon=True))
+        current = following
+
+    for thread in threads:
+        thread.start()
+    try:
+        yield from _drain(current, stop)
+    finally:
+        stop.set()
+
+
+def ingest_url(client, url, embeddings, batch_size=32, queue_size=4, storage=None):
+    # parse -> chunk -> embed -> write for the utils/embedding.py index, with all four
+    # stages running at the same time
+    def embed_stage(batches):
+        for batch in batches:
+            vectors = embeddings.embed_documents([chunk["text"] for chunk in batch])
+            yield batch, vectors
+
+    def write_stage(batches):
+        counter = 0
+        for batch, vectors in batches:
+            documents = []
+            for chunk, vector in zip(batch, vectors):
+                counter = counter + 1
+                documents.append({
+                    "redis_key": f"{KEY_PREFIX}{chunk_hash(url, chunk['text'])}",
+                    "element_id": chunk["element_id"],
+                    "doc_id": url,
+                    "id": f"webdoc:{counter:05}",
+                    "text": chunk["text"],
+                    "title": "",
+                    "authors": "",
+                    "published": "",
+                    "metadata": chunk["metadata"],
+                    "vector": list(vector),
+                })
+            yield from write_vectors(client, documents, batch_size=len(documents), storage=storage)
+
+    stages = [
+        chunk_iter,
+        lambda chunks: batched(chunks, batch_size),
+        embed_stage,
+        write_stage,
+    ]
+    results = list(run_stages(parse_iter(url), stages, queue_size=queue_size))
+    print(f"--> Ingested {url}: {len(results)} chunks")
+    return results
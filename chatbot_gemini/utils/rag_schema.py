@@ -1,10 +1,13 @@
-from typing import List, Optional
+from typing import TYPE_CHECKING, List, Optional
 from enum import Enum
-from torch import Tensor
 from uuid import uuid4
 from dataclasses import dataclass
 import json
 
+if TYPE_CHECKING:
+    # Only for the annotation below; importing torch at runtime takes seconds
+    from torch import Tensor
+
 
 class DataType(str, Enum):
     TITLE = "Title"
@@ -65,7 +68,7 @@ class DataElement(dict):
     data_type: DataType
     content: str | bytes
     metadata: Metadata
-    embeddings: Optional[Tensor] = None
+    embeddings: Optional["Tensor"] = None
 
 
 class Document(List[DataElement]):
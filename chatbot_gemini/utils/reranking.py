@@ -0,0 +1,59 @@
+import numpy as np
+
+
+def normalize(vectors):
+    vectors = np.asarray(vectors, dtype=np.float32)
+    norms = np.linalg.norm(vectors, axis=-1, keepdims=True)
+    norms[norms == 0] = 1
+    return vectors / norms
+
+
+def mmr(query_vector, candidate_vectors, k, lambda_mult=0.5):
+    # Maximal Marginal Relevance: each pick maximizes
+    #   lambda * sim(query, doc) - (1 - lambda) * max(sim(doc, already picked))
+    # All similarities come from two matrix products; the greedy loop only does
+    # k vectorized argmax/maximum updates over the candidates.
+    candidates = normalize(candidate_vectors)
+    if len(candidates) == 0:
+        return []
+    relevance = candidates @ normalize(query_vector)
+    similarity = candidates @ candidates.T
+    redundancy = np.full(len(candidates), -np.inf, dtype=np.float32)
+    available = np.ones(len(candidates), dtype=bool)
+    selected = []
+    for _ in range(min(k, len(candidates))):
+        if selected:
+            scores = lambda_mult * relevance - (1 - lambda_mult) * redundancy
+        else:
+            scores = relevance.copy()
+        scores[~available] = -np.inf
+        best = int(np.argmax(scores))
+        selected.append(best)
+        available[best] = False
+        redundancy = np.maximum(redundancy, similarity[best])
+    return selected
+
+
+def dedup(candidate_vectors, k, threshold=0.95):
+    # Keeps candidates in their original (relevance) order, skipping any that is at least
+    # `threshold` cosine-similar to a candidate that was kept before it
+    candidates = normalize(candidate_vectors)
+    if len(candidates) == 0:
+        return []
+    similarity = candidates @ candidates.T
+    selected = []
+    for position in range(len(candidates)):
+        if not selected or similarity[position, selected].max() < threshold:
+            selected.append(position)
+            if len(selected) == k:
+                break
+    return selected
+
+
+def rerank(query_vector, candidate_vectors, k, method="mmr", lambda_mult=0.5, threshold=0.95):
+    # Returns the positions of the k candidates to keep, in their new order
+    if method == "mmr":
+        return mmr(query_vector, candidate_vectors, k, lambda_mult)
+    if method == "dedup":
+        return dedup(candidate_vectors, k, threshold)
+    raise ValueError(f"Unknown rerank method {method}")
@@ -0,0 +1,49 @@
+import threading
+
+# Streamlit re-runs the page scripts on every interaction, but imported modules stay
+# in sys.modules, so anything kept here lives for the whole process and is shared by
+# every session and page.
+#
+# This is the only resource cache of the app: nothing uses st.cache_resource. Unlike
+# it, resources are shared by name across pages (gui.py and pages/chat.py get the same
+# "chat_model"), reset_resources() shuts executors and clients down instead of just
+# forgetting them, and the registry works without a Streamlit runtime (benchmarks).
+_resources = {}
+_locks = {}
+_registry_lock = threading.Lock()
+
+
+def get_resource(name, factory):
+    """Returns the resource registered as name, calling factory() the first time.
+
+    Thread-safe: concurrent sessions asking for the same resource wait for a single
+    factory call. Each name has its own lock, so a factory can ask for other resources
+    (e.g. the vector store for the embeddings) and a slow one (loading a model) doesn't
+    hold up the others.
+    """
+    if name in _resources:
+        return _resources[name]
+    with _registry_lock:
+        lock = _locks.setdefault(name, threading.Lock())
+    with lock:
+        if name not in _resources:
+            print(f"--> Creating resource {name}")
+            _resources[name] = factory()
+        return _resources[name]
+
+
+def reset_resources(*names):
+    # Drops the given resources (all of them when no name is given), so the next
+    # get_resource call builds them again. Executors and clients are shut down first.
+    with _registry_lock:
+        names = names or list(_resources)
+        dropped = [_resources.pop(name) for name in names if name in _resources]
+    for resource in dropped:
+        for method in ("shutdown", "close"):
+            if callable(getattr(resource, method, None)):
+                try:
+                    getattr(resource, method)()
+                except Exception as e:
+                    print(f"--> Failed to {method} {type(resource).__name__}: {e}")
+                break
+    return len(dropped)
@@ -0,0 +1,96 @@
+import json
+import time
+import hashlib
+import threading
+import numpy as np
+from collections import OrderedDict
+from utils.embedding import version_key
+
+
+class RetrievalCache:
+    """In-process cache of search results.
+
+    Entries are keyed on the normalized query vector rounded to `precision` decimals,
+    the filters and the index version, so any write to the index (which increments its
+    version) makes older entries miss. This is an exact-repeat cache: rounding absorbs
+    float noise between two embeddings of the same text, but a reworded question gets
+    a different vector and misses (benchmarks/retrieval_cache_hits.py measures how often).
+    The version is read from Redis at most once every `version_check_interval` seconds.
+    """
+
+    def __init__(self, ttl=300, max_size=1024, precision=2, version_check_interval=1.0):
+        self.ttl = ttl
+        self.max_size = max_size
+        self.precision = precision
+        self.version_check_interval = version_check_interval
+        self.stats = {"hits": 0, "misses": 0}
+        self._entries = OrderedDict()
+        self._versions = {}
+        self._lock = threading.Lock()
+
+    def index_version(self, client, index_name):
+        now = time.monotonic()
+        version, checked_at = self._versions.get(index_name, (None, 0))
+        if now - checked_at > self.version_check_interval:
+            version = client.get(version_key(index_name)) or 0
+            if isinstance(version, bytes):
+                version = version.decode("utf-8")
+            self._versions[index_name] = (version, now)
+        return version
+
+    def invalidate(self, index_name=None):
+        # Forces the next lookup to re-read the index version (or drops everything)
+        with self._lock:
+            if index_name is None:
+                self._entries.clear()
+                self._versions.clear()
+            else:
+                self._versions.pop(index_name, None)
+
+    def make_key(self, query_vector, index_name, version, **filters):
+        if isinstance(query_vector, (bytes, bytearray, memoryview)):
+            # Pre-packed vectors could be any vector type: only identical bytes share an entry
+            key = hashlib.sha256(query_vector)
+        else:
+            if isinstance(query_vector, str):
+                query_vector = json.loads(query_vector)
+            vector = np.asarray(query_vector, dtype=np.float32)
+            norm = np.linalg.norm(vector)
+            if norm:
+                vector = vector / norm
+            quantized = np.round(vector * 10 ** self.precision).astype(np.int16)
+            key = hashlib.sha256(quantized.tobytes())
+        key.update(json.dumps([index_name, str(version), filters], sort_keys=True, default=str).encode("utf-8"))
+        return key.hexdigest()
+
+    def get(self, key):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None or entry[0] < time.monotonic():
+                self._entries.pop(key, None)
+                self.stats["misses"] += 1
+                return None
+            self._entries.move_to_end(key)
+            self.stats["hits"] += 1
+            # A copy, so a caller reordering or trimming its results doesn't change the entry
+            return list(entry[1])
+
+    def put(self, key, value):
+        with self._lock:
+            self._entries[key] = (time.monotonic() + self.ttl, list(value))
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+
+    def get_or_search(self, client, index_name, query_vector, search, **filters):
+        key = self.make_key(query_vector, index_name, self.index_version(client, index_name), **filters)
+        result = self.get(key)
+        if result is None:
+            result = search()
+            self.put(key, result)
+            result = list(result)
+        return result
+
+    def hit_rate(self):
+        total = self.stats["hits"] + self.stats["misses"]
+        return self.stats["hits"] / total if total else 0.0